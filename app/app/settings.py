@@ -43,6 +43,7 @@ INSTALLED_APPS = [
     'rest_framework.authtoken',
     "rest_framework_api_key",
     'rest_framework_gis',
+    'django_filters',
     'drf_spectacular',
     'user',
     'road',
@@ -94,6 +95,21 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+    }
+}
+
+# Safety net only, the thresholds are invalidated whenever a Classification changes.
+CLASSIFICATION_CACHE_TIMEOUT = 60 * 60
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -146,9 +162,57 @@ API_KEY_CUSTOM_HEADER = "23231c7a-80a7-4810-93b3-98a18ecfbc42"
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'core.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
     'PAGE_SIZE': 100
 }
 
+# Compute the road read state from Velocity_Reads on every request instead of
+# the denormalized Road columns (useful until refresh_road_state has been run).
+ROAD_READ_STATE_FROM_READS = os.environ.get('ROAD_READ_STATE_FROM_READS') == 'true'
+
+# Range partitioning of the read tables, maintained by `manage_partitions`.
+READ_PARTITION_INTERVAL = os.environ.get('READ_PARTITION_INTERVAL', 'month')
+READ_PARTITION_PREMAKE = 3
+READ_PARTITION_RETENTION = None  # number of past partitions to keep, None keeps all
+
+# Number of plate reads validated and flushed per COPY during ingestion.
+PLATE_INGEST_CHUNK_SIZE = 5000
+
+# Rows fetched per server-side cursor round trip by the road GeoJSON export.
+ROAD_EXPORT_CHUNK_SIZE = 2000
+
+# Lifetime of a cached road vector tile; tiles are also invalidated on road/read changes.
+ROAD_TILE_CACHE_TIMEOUT = 3600
+
+# Per-process cache of token -> user resolutions used by CachedTokenAuthentication.
+# The TTL bounds how long a token revoked in another process keeps working; 0 disables it.
+AUTH_TOKEN_CACHE_SIZE = int(os.environ.get('AUTH_TOKEN_CACHE_SIZE', 10000))
+AUTH_TOKEN_CACHE_TTL = int(os.environ.get('AUTH_TOKEN_CACHE_TTL', 60))
+
+# Seconds a successful API key verification is cached by CachedHasAPIKey.
+API_KEY_CACHE_TTL = int(os.environ.get('API_KEY_CACHE_TTL', 30))
+
+# Per-process sensor uuid / license plate identity caches of the plate read creation.
+IDENTITY_CACHE_SENSORS = 10000
+IDENTITY_CACHE_CARS = 100000
+IDENTITY_CACHE_TTL = 300
+
+# Durable queue of reads accepted with `Prefer: respond-async`, drained by `drain_ingest_queue`.
+# Past INGEST_QUEUE_MAX_DEPTH queued items new requests get 503 with Retry-After.
+# The worker invalidates tiles and thresholds through CACHES, which must then be shared (not locmem).
+INGEST_QUEUE_PATH = os.environ.get('INGEST_QUEUE_PATH', str(BASE_DIR / 'var' / 'ingest_queue.sqlite3'))
+INGEST_QUEUE_MAX_DEPTH = int(os.environ.get('INGEST_QUEUE_MAX_DEPTH', 1000000))
+INGEST_QUEUE_RETRY_AFTER = 5
+INGEST_QUEUE_BATCH_SIZE = 20000
+
 GDAL_LIBRARY_PATH = '/usr/lib/libgdal.so'
 GEOS_LIBRARY_PATH = '/usr/lib/libgeos_c.so'
\ No newline at end of file
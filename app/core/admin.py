@@ -55,3 +55,4 @@ admin.site.register(models.Road)
 admin.site.register(models.Velocity_Reads)
 admin.site.register(models.Classification)
 admin.site.register(models.Sensor)
+admin.site.register(models.ImportCheckpoint)
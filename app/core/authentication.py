@@ -0,0 +1,58 @@
+"""
+Authentication classes for the APIs.
+"""
+
+from django.conf import settings
+from rest_framework.authentication import TokenAuthentication
+
+from core.lru import LRUCache
+
+token_cache = LRUCache(
+    maxsize=settings.AUTH_TOKEN_CACHE_SIZE,
+    ttl=settings.AUTH_TOKEN_CACHE_TTL,
+)
+
+
+def _freeze(instance):
+    """Return the model, database and field values of an instance."""
+    fields = [field.attname for field in instance._meta.concrete_fields]
+    return type(instance), instance._state.db, fields, tuple(getattr(instance, f) for f in fields)
+
+
+def _thaw(frozen):
+    """Build a fresh instance from _freeze() output, as if just loaded."""
+    model, db, fields, values = frozen
+    return model.from_db(db, fields, values)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication that keeps the token to user resolution in a per-process
+    LRU cache. Entries are dropped by the signal handlers when the token is
+    deleted or its user saved (deactivation, password change); the TTL bounds
+    how long other processes may keep serving them.
+    Only field values are cached: every request gets its own user instance,
+    so per-instance state such as the permission caches is never shared.
+    """
+
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is not None:
+            _, frozen_user, frozen_token = cached
+            user, token = _thaw(frozen_user), _thaw(frozen_token)
+            token.user = user
+            return user, token
+
+        user, token = super().authenticate_credentials(key)
+        token_cache.set(key, (user.pk, _freeze(user), _freeze(token)))
+        return user, token
+
+
+def invalidate_token(key):
+    """Drop a cached token."""
+    token_cache.delete(key)
+
+
+def invalidate_user_tokens(user_id):
+    """Drop the cached tokens of a user."""
+    token_cache.delete_where(lambda key, value: value[0] == user_id)
@@ -0,0 +1,84 @@
+"""
+Benchmarks for the API plumbing, run with `manage.py benchmark`.
+"""
+
+import io
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+from rest_framework_api_key.models import APIKey
+from rest_framework_api_key.permissions import HasAPIKey
+
+from core.authentication import CachedTokenAuthentication, token_cache
+from core.parsers import ORJSONParser
+from core.permissions import CachedHasAPIKey
+from core.renderers import ORJSONRenderer
+from core.models import Road
+from road.benchmarks import make_roads
+from road.serializers import RoadSerializer
+from sensor.benchmarks import benchmark_fixtures, make_plate_reads
+
+
+def json_codec(size, timer, report):
+    """Compare DRF's stdlib json renderer/parser with the orjson ones."""
+    make_roads(size, vertices=50)
+    roads = RoadSerializer(
+        Road.objects.with_read_state().order_by('-id')[:size], many=True
+    ).data
+    road, sensor = benchmark_fixtures()
+    reads = make_plate_reads(size, road, sensor)
+
+    for label, renderer, parser in (
+        ('stdlib json', JSONRenderer(), JSONParser()),
+        ('orjson', ORJSONRenderer(), ORJSONParser()),
+    ):
+        body = timer(f'render roads GeoJSON ({label})', size, renderer.render, roads)
+        report(f'bytes roads GeoJSON ({label})', f'{len(body):>12}')
+        body = timer(f'render plate reads ({label})', size, renderer.render, reads)
+        timer(f'parse plate reads ({label})', size, parser.parse, io.BytesIO(body))
+
+
+def token_auth(size, timer, report):
+    """Compare TokenAuthentication with CachedTokenAuthentication on repeated requests."""
+    user = get_user_model().objects.create_user('benchmark@example.com', 'benchmark123')
+    token = Token.objects.create(user=user)
+    request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Token {token.key}')
+    token_cache.clear()
+
+    for label, auth in (
+        ('TokenAuthentication', TokenAuthentication()),
+        ('CachedTokenAuthentication', CachedTokenAuthentication()),
+    ):
+        def authenticate():
+            for _ in range(size):
+                auth.authenticate(request)
+
+        with CaptureQueriesContext(connection) as ctx:
+            timer(f'authenticate ({label})', size, authenticate)
+        report(f'queries ({label})', len(ctx.captured_queries))
+    report('token cache', token_cache.stats())
+
+
+def api_key(size, timer, report):
+    """Compare HasAPIKey with CachedHasAPIKey on repeated sensor requests."""
+    _, key = APIKey.objects.create_key(name='benchmark')
+    request = APIRequestFactory().post('/', **{settings.API_KEY_CUSTOM_HEADER: key})
+
+    for label, permission in (
+        ('HasAPIKey', HasAPIKey()),
+        ('CachedHasAPIKey', CachedHasAPIKey()),
+    ):
+        def check():
+            for _ in range(size):
+                permission.has_permission(request, None)
+
+        with CaptureQueriesContext(connection) as ctx:
+            timer(f'has_permission ({label})', size, check)
+        report(f'queries ({label})', len(ctx.captured_queries))
@@ -0,0 +1,165 @@
+"""
+Durable local queue of accepted reads for the asynchronous ingestion mode.
+
+Requests sent with `Prefer: respond-async` are validated, appended to a
+SQLite file (one entry per request) and answered with 202 Accepted; the
+`drain_ingest_queue` command flushes the entries in large batches.
+"""
+
+import os
+import sqlite3
+import time
+from contextlib import closing
+
+import orjson
+
+from django.conf import settings
+from rest_framework import status
+from rest_framework.response import Response
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS entries (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        kind TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        payload BLOB NOT NULL,
+        enqueued_at REAL NOT NULL
+    )
+    """,
+    # entries that kept failing to flush, kept for inspection
+    """
+    CREATE TABLE IF NOT EXISTS dead_entries (
+        id INTEGER PRIMARY KEY,
+        kind TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        payload BLOB NOT NULL,
+        enqueued_at REAL NOT NULL,
+        error TEXT NOT NULL
+    )
+    """,
+]
+
+
+class IngestQueue:
+    """
+    Append only queue of JSON item lists stored in a SQLite database in WAL
+    mode, safe to share between the web processes and the drain worker.
+    Entries are removed with ack() once flushed (at least once delivery).
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+
+    def connect(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=FULL')
+        for statement in SCHEMA:
+            conn.execute(statement)
+        return conn
+
+    def put(self, kind, items):
+        """Append a list of items and return the queue depth after it."""
+        with closing(self.connect()) as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute(
+                'INSERT INTO entries (kind, size, payload, enqueued_at) VALUES (?, ?, ?, ?)',
+                (kind, len(items), orjson.dumps(items), time.time()),
+            )
+            depth = self._depth(conn)
+            conn.execute('COMMIT')
+        return depth
+
+    def claim(self, max_items):
+        """
+        Return the oldest entries as (id, kind, items, enqueued_at) tuples,
+        up to max_items items (at least one entry when the queue is not empty).
+        """
+        entries, total = [], 0
+        with closing(self.connect()) as conn:
+            for pk, kind, size, payload, enqueued_at in conn.execute(
+                'SELECT id, kind, size, payload, enqueued_at FROM entries ORDER BY id'
+            ):
+                if entries and total + size > max_items:
+                    break
+                entries.append((pk, kind, orjson.loads(payload), enqueued_at))
+                total += size
+        return entries
+
+    def ack(self, ids):
+        """Remove flushed entries."""
+        if not ids:
+            return
+        with closing(self.connect()) as conn:
+            conn.executemany('DELETE FROM entries WHERE id = ?', [(pk,) for pk in ids])
+
+    def bury(self, pk, error):
+        """Move an entry that can not be flushed to the dead entries."""
+        with closing(self.connect()) as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute(
+                'INSERT INTO dead_entries (id, kind, size, payload, enqueued_at, error) '
+                'SELECT id, kind, size, payload, enqueued_at, ? FROM entries WHERE id = ?',
+                (error, pk),
+            )
+            conn.execute('DELETE FROM entries WHERE id = ?', (pk,))
+            conn.execute('COMMIT')
+
+    def depth(self):
+        """Number of queued items."""
+        with closing(self.connect()) as conn:
+            return self._depth(conn)
+
+    def stats(self):
+        """Queued items and entries, dead entries and the age in seconds of the oldest entry."""
+        with closing(self.connect()) as conn:
+            entries, items, oldest = conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0), MIN(enqueued_at) FROM entries'
+            ).fetchone()
+            dead = conn.execute('SELECT COUNT(*) FROM dead_entries').fetchone()[0]
+        return {
+            'depth': items,
+            'entries': entries,
+            'dead_entries': dead,
+            'oldest_age': round(time.time() - oldest, 3) if oldest is not None else 0,
+        }
+
+    @staticmethod
+    def _depth(conn):
+        return conn.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+
+
+def get_queue():
+    """The ingestion queue at INGEST_QUEUE_PATH."""
+    return IngestQueue(settings.INGEST_QUEUE_PATH)
+
+
+def wants_async(request):
+    """True when the client asked for `Prefer: respond-async` (RFC 7240)."""
+    preferences = request.META.get('HTTP_PREFER', '')
+    return 'respond-async' in (p.split(';')[0].strip().lower() for p in preferences.split(','))
+
+
+def enqueue_response(kind, items, **extra):
+    """
+    Queue validated items and answer 202 Accepted, or 503 with Retry-After
+    when the queue is deeper than INGEST_QUEUE_MAX_DEPTH (back-pressure).
+    """
+    queue = get_queue()
+    if queue.depth() + len(items) > settings.INGEST_QUEUE_MAX_DEPTH:
+        return Response(
+            {"detail": "Ingestion queue is full, retry later."},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            headers={'Retry-After': str(settings.INGEST_QUEUE_RETRY_AFTER)},
+        )
+
+    depth = queue.put(kind, items)
+    return Response(
+        {"queued": len(items), "depth": depth, **extra},
+        status=status.HTTP_202_ACCEPTED,
+        headers={'Preference-Applied': 'respond-async'},
+    )
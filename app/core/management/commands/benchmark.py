@@ -0,0 +1,67 @@
+"""
+Django command to run the performance benchmarks.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+BENCHMARKS = {
+    'api-key': 'core.benchmarks.api_key',
+    'json-codec': 'core.benchmarks.json_codec',
+    'pass-by': 'sensor.benchmarks.pass_by',
+    'plate-create': 'sensor.benchmarks.plate_create',
+    'plate-ingest': 'sensor.benchmarks.plate_ingest',
+    'plate-read-list': 'sensor.benchmarks.plate_read_list',
+    'road-payload': 'road.benchmarks.road_payload',
+    'token-auth': 'core.benchmarks.token_auth',
+}
+
+
+class Rollback(Exception):
+    """Raised to discard the data a benchmark created."""
+
+
+class Command(BaseCommand):
+    """
+    Run a benchmark inside a transaction that is rolled back afterwards.
+    A benchmark is a function(size, timer, report) that times its cases with
+    timer and prints other measurements with report.
+    """
+
+    help = "Run a performance benchmark against the configured database."
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', choices=sorted(BENCHMARKS))
+        parser.add_argument(
+            '--size',
+            type=int,
+            default=10000,
+            help='Number of items each case processes.',
+        )
+
+    def handle(self, *args, **options):
+        """Entry point for command."""
+        benchmark = import_string(BENCHMARKS[options['name']])
+        self.stdout.write(f"Running {options['name']} with {options['size']} items...")
+        try:
+            with transaction.atomic():
+                benchmark(options['size'], self.timer, self.report)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def timer(self, label, items, func, *args, **kwargs):
+        """Run func, report its throughput and return its result."""
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+        rate = items / elapsed if elapsed else float('inf')
+        self.stdout.write(f"  {label:<40} {elapsed:9.3f}s {rate:12.0f} items/s")
+        return result
+
+    def report(self, label, value):
+        """Print a measurement that is not a throughput."""
+        self.stdout.write(f"  {label:<40} {value}")
@@ -0,0 +1,141 @@
+"""
+Django command that flushes the reads queued with `Prefer: respond-async`.
+"""
+
+import logging
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import (
+    InterfaceError,
+    OperationalError,
+    close_old_connections,
+    connection,
+    transaction,
+)
+from django.utils.module_loading import import_string
+
+from core.ingest_queue import get_queue
+
+logger = logging.getLogger(__name__)
+
+# queue kind -> callable(items) returning a report with 'created' and 'rejected_count'
+FLUSHERS = {
+    'velocity-reads': 'road.serializers.ingest_read_batch',
+    'plate-reads': 'sensor.ingest.ingest_plate_reads',
+}
+
+# Longest wait between retries after a failed flush.
+MAX_BACKOFF = 60
+
+
+class Command(BaseCommand):
+    """Drain the ingestion queue in large batches."""
+
+    help = "Flush queued velocity and plate reads into the database."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.INGEST_QUEUE_BATCH_SIZE,
+            help='Queued items flushed per batch.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1.0,
+            help='Seconds to wait when the queue is empty.',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit once the queue is empty instead of polling.',
+        )
+        parser.add_argument(
+            '--max-attempts',
+            type=int,
+            default=5,
+            help='Failed flushes of an entry before it is moved to the dead entries.',
+        )
+
+    def handle(self, *args, **options):
+        """Entry point for command."""
+        queue = get_queue()
+        self.stdout.write(f"Draining {queue.path}...")
+        if settings.CACHES['default']['BACKEND'].endswith('LocMemCache'):
+            self.stderr.write(self.style.WARNING(
+                "The cache is per process: tile and threshold invalidations of this "
+                "worker are not seen by the web processes, configure a shared CACHE_BACKEND."
+            ))
+
+        flushed = failures = 0
+        attempts = {}
+        while True:
+            # after a failure entries are flushed one at a time to isolate a bad one
+            entries = queue.claim(1 if failures else options['batch_size'])
+            if not entries:
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+                continue
+
+            try:
+                flushed += self.flush(queue, entries)
+            except (OperationalError, InterfaceError):
+                # database unavailable: keep the entries and wait for it
+                logger.exception("Flush failed, database unavailable")
+                connection.close()
+            except Exception as error:
+                logger.exception("Flush of entries %s failed", [pk for pk, *_ in entries])
+                if len(entries) == 1:
+                    pk = entries[0][0]
+                    attempts[pk] = attempts.get(pk, 0) + 1
+                    if attempts[pk] >= options['max_attempts']:
+                        queue.bury(pk, repr(error))
+                        del attempts[pk]
+                        logger.error("Entry %s moved to the dead entries", pk)
+            else:
+                failures = 0
+                close_old_connections()
+                continue
+
+            failures += 1
+            time.sleep(min(options['interval'] * 2 ** failures, MAX_BACKOFF))
+
+        self.stdout.write(self.style.SUCCESS(f"{flushed} queued reads flushed!"))
+
+    def flush(self, queue, entries):
+        """
+        Flush claimed entries in one transaction, one call per kind, then
+        remove them from the queue.
+        """
+        batches = defaultdict(list)
+        for _, kind, items, _ in entries:
+            batches[kind].extend(items)
+
+        started = time.perf_counter()
+        report = {'created': 0, 'rejected_count': 0}
+        with transaction.atomic():
+            for kind, items in batches.items():
+                result = import_string(FLUSHERS[kind])(items)
+                report['created'] += result['created']
+                report['rejected_count'] += result['rejected_count']
+        latency = time.perf_counter() - started
+        # acknowledged after the insert: a crash in between replays the entries
+        queue.ack([pk for pk, *_ in entries])
+
+        stats = queue.stats()
+        lag = time.time() - min(enqueued_at for *_, enqueued_at in entries)
+        message = (
+            f"flushed={sum(len(items) for items in batches.values())} "
+            f"created={report['created']} rejected={report['rejected_count']} "
+            f"flush_latency_ms={latency * 1000:.1f} queue_lag_s={lag:.3f} "
+            f"depth={stats['depth']} oldest_age_s={stats['oldest_age']} "
+            f"dead_entries={stats['dead_entries']}"
+        )
+        logger.info(message)
+        self.stdout.write(message)
+        return report['created']
@@ -1,49 +1,161 @@
 import csv
+import mmap
 import os
-from decimal import Decimal
+import time
+from collections import deque
+from contextlib import contextmanager
+from decimal import Decimal, InvalidOperation
+from multiprocessing import Pool
+
 from core.models import(
     Road,
     Velocity_Reads,
     User,
     Classification,
-    Sensor
+    Sensor,
+    ImportCheckpoint
 )
 
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.contrib.auth import get_user_model
 from django.contrib.gis.geos import LineString
-from decimal import Decimal
+from django.db import transaction
+from django.db.models import F
+
+TRAFFIC_SPEED_FILE = 'Traffic_Speed/traffic_speed.csv'
+SENSORS_FILE = 'Traffic_Speed/sensors.csv'
+
+
+def parse_rows(chunk):
+    """
+    Parse a chunk of traffic speed CSV lines, run in the worker processes.
+    Return the (name, coords, length, speed) tuples, the count of bad rows and
+    the byte offset the chunk ends at.
+    """
+    fieldnames, lines, end_offset = chunk
+    parsed, skipped = [], 0
+    decoded = (line.decode('utf-8') for line in lines)
+    for line in csv.DictReader(decoded, fieldnames=fieldnames):
+        try:
+            parsed.append((
+                'Road ' + str(line['ID']),
+                (
+                    (float(line['Long_start']), float(line['Lat_start'])),
+                    (float(line['Long_end']), float(line['Lat_end'])),
+                ),
+                float(line['Length']),
+                Decimal(line['Speed']).quantize(Decimal('0.01')),
+            ))
+        except (KeyError, TypeError, ValueError, InvalidOperation):
+            skipped += 1
+    return parsed, skipped, end_offset
+
+
+@contextmanager
+def chunk_mapper(workers):
+    """
+    Yield an ordered, lazy map over a worker pool (or in process for one worker).
+    At most 2 * workers chunks are read and parsed ahead of the consumer, so a
+    slow writer bounds the memory instead of letting results pile up.
+    """
+    if workers <= 1:
+        yield map
+        return
+    with Pool(workers) as pool:
+        def bounded_map(func, iterable):
+            pending = deque()
+            for item in iterable:
+                pending.append(pool.apply_async(func, (item,)))
+                if len(pending) >= 2 * workers:
+                    yield pending.popleft().get()
+            while pending:
+                yield pending.popleft().get()
+
+        yield bounded_map
+
+
+@contextmanager
+def open_source(path, use_mmap):
+    """Open a file for binary reading, optionally memory-mapped."""
+    with open(path, 'rb') as dataFile:
+        if not use_mmap or os.fstat(dataFile.fileno()).st_size == 0:
+            yield dataFile
+            return
+        with mmap.mmap(dataFile.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
+
+
+def read_chunks(source, offset, batch_size):
+    """
+    Yield (fieldnames, lines, end offset) chunks of a CSV file from a byte offset.
+    Records are split on line ends, so quoted fields must not contain newlines.
+    """
+    source.seek(0)
+    fieldnames = next(csv.reader([source.readline().decode('utf-8-sig')]), None)
+    if not fieldnames:
+        return
+    source.seek(max(offset, source.tell()))
+    while True:
+        lines = []
+        for _ in range(batch_size):
+            line = source.readline()
+            if not line:
+                break
+            if line.strip():
+                lines.append(line)
+        if not lines:
+            return
+        yield fieldnames, lines, source.tell()
 
 
 class Command(BaseCommand):
     """Django command to import inicial data."""
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--file',
+            action='append',
+            dest='files',
+            help='Traffic speed CSV to import, can be repeated. Defaults to seeding an empty database.',
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Continue files from their last checkpoint.',
+        )
+        parser.add_argument(
+            '--mmap',
+            action='store_true',
+            help='Memory-map the files instead of buffered reads.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Rows parsed and written per transaction.',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Processes parsing the CSV.',
+        )
+
     def handle(self, *args, **options):
         """Entry point for command."""
-        if not Road.objects.exists():
-            self.stdout.write("Populating database reads...")
+        files = options['files']
+        if files is None:
+            seeding = not Road.objects.exists() or ImportCheckpoint.objects.filter(
+                path=os.path.realpath(TRAFFIC_SPEED_FILE)
+            ).exists()
+            files = [TRAFFIC_SPEED_FILE] if seeding else []
 
-            with open('Traffic_Speed/traffic_speed.csv', newline='') as dataFile:
-                reader = csv.DictReader(dataFile)
-                for line in reader:
-                    road,_=Road.objects.get_or_create(
-                        name = 'Road '+ str(line['ID']),
-                        segment = LineString(
-                        (float(line['Lat_start']),float(line['Long_start'])),
-                        (float(line['Lat_end']),float(line['Lat_end']))
-                        ),
-                        length = float(line['Length'])
-                        
-                    )
-                    Velocity_Reads.objects.get_or_create(
-                        road=road,
-                        read_value=Decimal(line['Speed'])
-                    )
-            self.stdout.write(self.style.SUCCESS("Database reads populated!"))
+        for path in files:
+            self.import_file(path, options)
 
         if not Sensor.objects.exists():
             self.stdout.write("Populating database sensors...")
-            with open('Traffic_Speed/sensors.csv', newline='') as dataFile:
+            with open(SENSORS_FILE, newline='') as dataFile:
                 
                 reader = csv.DictReader(dataFile)
                 for line in reader:
@@ -66,3 +178,70 @@ class Command(BaseCommand):
                 max_value = Decimal('50')
             )
 
+    def import_file(self, path, options):
+        """Import a file, starting from its checkpoint when resuming."""
+        checkpoint, created = ImportCheckpoint.objects.get_or_create(path=os.path.realpath(path))
+        if not created and not options['resume']:
+            if checkpoint.completed:
+                self.stdout.write(f"{path} already imported, skipping")
+                return
+            raise CommandError(
+                f"Import of {path} stopped at row {checkpoint.rows}, rerun with --resume"
+            )
+
+        self.stdout.write(f"Importing {path} from row {checkpoint.rows}...")
+        self.import_reads(checkpoint, options)
+        checkpoint.completed = True
+        checkpoint.save(update_fields=['completed', 'updated_at'])
+        self.stdout.write(self.style.SUCCESS(f"{path} imported, {checkpoint.rows} rows"))
+
+    def import_reads(self, checkpoint, options):
+        """
+        Parse the file in a worker pool and write it chunk by chunk, each chunk
+        committed together with the checkpoint.
+        """
+        road_ids = {}
+        rows = skipped = 0
+        started = time.perf_counter()
+        with open_source(checkpoint.path, options['mmap']) as source:
+            chunks = read_chunks(source, checkpoint.byte_offset, options['batch_size'])
+            with chunk_mapper(options['workers']) as mapper:
+                for parsed, bad, end_offset in mapper(parse_rows, chunks):
+                    with transaction.atomic():
+                        self.write_batch(parsed, road_ids)
+                        ImportCheckpoint.objects.filter(pk=checkpoint.pk).update(
+                            byte_offset=end_offset, rows=F('rows') + len(parsed) + bad
+                        )
+                    rows += len(parsed)
+                    skipped += bad
+                    elapsed = time.perf_counter() - started
+                    self.stdout.write(f"{rows} rows imported ({rows / elapsed:.0f} rows/s)")
+
+        checkpoint.refresh_from_db()
+        if skipped:
+            self.stdout.write(self.style.WARNING(f"{skipped} malformed rows skipped"))
+
+    def write_batch(self, parsed, road_ids):
+        """
+        Create the unseen roads and the reads of a parsed batch.
+        road_ids maps (name, coords) to the id of every road seen so far.
+        """
+        new_roads = {}
+        for name, coords, length, _ in parsed:
+            key = (name, coords)
+            if key not in road_ids and key not in new_roads:
+                road = Road(name=name, segment=LineString(coords), length=length)
+                road.simplify_segment()
+                new_roads[key] = road
+
+        if new_roads:
+            # roads already in the database are left alone and looked up below
+            Road.objects.bulk_create(new_roads.values(), ignore_conflicts=True)
+            names = {name for name, _ in new_roads}
+            for road in Road.objects.filter(name__in=names).only('id', 'name', 'segment'):
+                road_ids[(road.name, tuple(road.segment.coords))] = road.id
+
+        Velocity_Reads.objects.bulk_ingest([
+            Velocity_Reads(road_id=road_ids[(name, coords)], read_value=speed)
+            for name, coords, _, speed in parsed
+        ])
@@ -0,0 +1,89 @@
+"""
+Django command to maintain the read table partitions.
+"""
+
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from core.models import Road, Velocity_Reads
+from core.partitions import (
+    INTERVALS,
+    PARTITIONED_MODELS,
+    ensure_partitions,
+    expire_partitions,
+)
+
+
+class Command(BaseCommand):
+    """Pre-create future read partitions and expire the old ones."""
+
+    help = "Create upcoming partitions of the read tables and expire old ones."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            choices=INTERVALS,
+            default=settings.READ_PARTITION_INTERVAL,
+            help='Partition width.',
+        )
+        parser.add_argument(
+            '--ahead',
+            type=int,
+            default=settings.READ_PARTITION_PREMAKE,
+            help='Number of future partitions to keep created.',
+        )
+        parser.add_argument(
+            '--retention',
+            type=int,
+            default=settings.READ_PARTITION_RETENTION,
+            help='Number of past partitions to keep, older ones are expired.',
+        )
+        parser.add_argument(
+            '--since',
+            help='Also create partitions back to this date (YYYY-MM-DD), '
+                 'moving matching rows out of the default partition.',
+        )
+        parser.add_argument(
+            '--drop',
+            action='store_true',
+            help='Drop expired partitions instead of detaching them.',
+        )
+
+    def handle(self, *args, **options):
+        """Entry point for command."""
+        since = None
+        if options['since']:
+            day = parse_date(options['since'])
+            if day is None:
+                raise CommandError("--since must be a YYYY-MM-DD date.")
+            since = datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+
+        interval = options['interval']
+        for model in PARTITIONED_MODELS:
+            table = model._meta.db_table
+            created = ensure_partitions(
+                table,
+                interval,
+                options['ahead'],
+                since=since,
+            )
+            for name in created:
+                self.stdout.write(f"Created partition {name}")
+
+            if options['retention'] is not None:
+                expired = expire_partitions(
+                    table, interval, options['retention'], drop=options['drop']
+                )
+                action = "Dropped" if options['drop'] else "Detached"
+                for name in expired:
+                    self.stdout.write(f"{action} partition {name}")
+                if expired and model is Velocity_Reads:
+                    # detaching skips the signals, recount the reads still attached
+                    updated = Road.objects.refresh_read_state()
+                    self.stdout.write(f"Refreshed the read state of {updated} roads")
+
+        self.stdout.write(self.style.SUCCESS("Read partitions up to date!"))
+
@@ -0,0 +1,54 @@
+"""
+Django command to rebuild the road speed rollups from the raw reads.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+from core.models import ROLLUP_BUCKETS, RoadSpeedRollup
+
+
+class Command(BaseCommand):
+    """Recompute the speed rollups from Velocity_Reads."""
+
+    help = "Rebuild the per road speed rollups, for history or after deletes."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--bucket',
+            choices=list(ROLLUP_BUCKETS),
+            action='append',
+            dest='buckets',
+            help='Only rebuild this bucket size (can be repeated).',
+        )
+        parser.add_argument(
+            '--road',
+            type=int,
+            action='append',
+            dest='roads',
+            help='Only rebuild the given road id (can be repeated).',
+        )
+        parser.add_argument('--from', dest='since', help='ISO datetime to start from.')
+        parser.add_argument('--to', dest='until', help='ISO datetime to stop at.')
+
+    def handle(self, *args, **options):
+        """Entry point for command."""
+        since = self.parse_moment(options['since'], '--from')
+        until = self.parse_moment(options['until'], '--to')
+
+        self.stdout.write("Rebuilding speed rollups...")
+        rebuilt = RoadSpeedRollup.objects.rebuild(
+            buckets=options['buckets'],
+            road_ids=options['roads'],
+            since=since,
+            until=until,
+        )
+        self.stdout.write(self.style.SUCCESS(f"{rebuilt} rollups rebuilt!"))
+
+    def parse_moment(self, value, option):
+        if value is None:
+            return None
+        moment = parse_datetime(value)
+        if moment is None or moment.tzinfo is None:
+            raise CommandError(f"{option} must be an ISO datetime with a timezone.")
+        return moment
@@ -0,0 +1,28 @@
+"""
+Django command to backfill or repair the denormalized road read state.
+"""
+
+from django.core.management.base import BaseCommand
+
+from core.models import Road
+
+
+class Command(BaseCommand):
+    """Recompute total_reads and the last read of roads from Velocity_Reads."""
+
+    help = "Recompute the denormalized read state of roads."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--road',
+            type=int,
+            action='append',
+            dest='roads',
+            help='Only refresh the given road id (can be repeated).',
+        )
+
+    def handle(self, *args, **options):
+        """Entry point for command."""
+        self.stdout.write("Refreshing road read state...")
+        updated = Road.objects.refresh_read_state(options['roads'])
+        self.stdout.write(self.style.SUCCESS(f"{updated} roads refreshed!"))
@@ -0,0 +1,47 @@
+# Generated by Django 3.2.25 on 2026-10-18 09:12
+
+from django.db import migrations, models
+
+
+BACKFILL_SQL = """
+UPDATE core_road AS r
+SET total_reads = s.total_reads,
+    last_read_value = s.read_value,
+    last_read_at = s.read_at
+FROM (
+    SELECT DISTINCT ON (road_id)
+        road_id,
+        count(*) OVER (PARTITION BY road_id) AS total_reads,
+        read_value,
+        read_at
+    FROM core_velocity_reads
+    ORDER BY road_id, read_at DESC, id DESC
+) AS s
+WHERE r.id = s.road_id;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_auto_20250707_2027'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='road',
+            name='total_reads',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='road',
+            name='last_read_value',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=5, null=True),
+        ),
+        migrations.AddField(
+            model_name='road',
+            name='last_read_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunSQL(BACKFILL_SQL, migrations.RunSQL.noop),
+    ]
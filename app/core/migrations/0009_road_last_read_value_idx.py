@@ -0,0 +1,17 @@
+# Generated by Django 3.2.25 on 2026-10-18 10:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_road_read_state'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='road',
+            index=models.Index(fields=['last_read_value'], name='road_last_read_value_idx'),
+        ),
+    ]
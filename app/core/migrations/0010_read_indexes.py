@@ -0,0 +1,29 @@
+# Generated by Django 3.2.25 on 2026-10-18 10:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_road_last_read_value_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='velocity_reads',
+            index=models.Index(fields=['road', 'read_at', 'id'], name='vreads_road_read_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='velocity_reads',
+            index=models.Index(fields=['read_at', 'id'], name='vreads_read_at_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='plates_reads',
+            index=models.Index(fields=['car_plate', 'read_at'], name='preads_car_read_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='plates_reads',
+            index=models.Index(fields=['read_at', 'id'], name='preads_read_at_id_idx'),
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 3.2.25 on 2026-10-18 11:20
+
+from django.db import migrations
+
+PARTITIONED_TABLES = ('core_velocity_reads', 'core_plates_reads')
+PARTITION_KEY = 'read_at'
+
+CONVERT_SQL = """
+ALTER TABLE {table} RENAME TO {table}_legacy;
+ALTER TABLE {table}_legacy RENAME CONSTRAINT {table}_pkey TO {table}_legacy_pkey;
+CREATE TABLE {table} (LIKE {table}_legacy INCLUDING DEFAULTS INCLUDING CONSTRAINTS){partition_by};
+{default_partition}
+ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY ({primary_key});
+INSERT INTO {table} SELECT * FROM {table}_legacy;
+DO $$
+DECLARE r record;
+BEGIN
+    EXECUTE format(
+        'ALTER SEQUENCE %s OWNED BY {table}.id',
+        pg_get_serial_sequence('{table}_legacy', 'id')
+    );
+    FOR r IN
+        SELECT conname, pg_get_constraintdef(oid) AS def
+        FROM pg_constraint
+        WHERE conrelid = '{table}_legacy'::regclass AND contype = 'f'
+    LOOP
+        EXECUTE format('ALTER TABLE {table}_legacy DROP CONSTRAINT %I', r.conname);
+        EXECUTE format('ALTER TABLE {table} ADD CONSTRAINT %I %s', r.conname, r.def);
+    END LOOP;
+    FOR r IN
+        SELECT i.relname AS name, pg_get_indexdef(i.oid) AS def
+        FROM pg_index x JOIN pg_class i ON i.oid = x.indexrelid
+        WHERE x.indrelid = '{table}_legacy'::regclass AND NOT x.indisprimary
+    LOOP
+        EXECUTE format('DROP INDEX %I', r.name);
+        EXECUTE regexp_replace(r.def, ' ON (ONLY )?\\S*{table}_legacy ', ' ON {table} ');
+    END LOOP;
+END $$;
+DROP TABLE {table}_legacy;
+"""
+
+
+def convert_sql(table, partitioned):
+    """
+    Rebuild table as a range partitioned table on read_at (or back as a plain
+    table), keeping its data, sequence, foreign keys and indexes.
+    """
+    if partitioned:
+        return CONVERT_SQL.format(
+            table=table,
+            partition_by=f' PARTITION BY RANGE ({PARTITION_KEY})',
+            default_partition=f'CREATE TABLE {table}_default PARTITION OF {table} DEFAULT;',
+            primary_key=f'id, {PARTITION_KEY}',
+        )
+    return CONVERT_SQL.format(
+        table=table,
+        partition_by='',
+        default_partition='',
+        primary_key='id',
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_read_indexes'),
+    ]
+
+    operations = [
+        migrations.RunSQL(convert_sql(table, True), convert_sql(table, False))
+        for table in PARTITIONED_TABLES
+    ]
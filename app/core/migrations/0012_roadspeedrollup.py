@@ -0,0 +1,32 @@
+# Generated by Django 3.2.25 on 2026-10-18 12:02
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_partition_reads'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoadSpeedRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.CharField(choices=[('5m', '5m'), ('1h', '1h'), ('1d', '1d')], max_length=2)),
+                ('bucket_start', models.DateTimeField()),
+                ('read_count', models.PositiveIntegerField()),
+                ('min_value', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('max_value', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('sum_value', models.DecimalField(decimal_places=2, max_digits=16)),
+                ('sum_squares', models.DecimalField(decimal_places=4, max_digits=20)),
+                ('road', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='speed_rollups', to='core.road')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='roadspeedrollup',
+            constraint=models.UniqueConstraint(fields=('road', 'bucket', 'bucket_start'), name='unique_road_speed_rollup'),
+        ),
+    ]
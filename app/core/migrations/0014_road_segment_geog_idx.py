@@ -0,0 +1,22 @@
+# Generated by Django 3.2.25 on 2026-10-18 14:05
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    GiST index on the geography cast of Road.segment, used by the metre based
+    ST_DWithin radius filter. The planar &&/<-> filters use the GiST index
+    GeoDjango creates on the segment column itself.
+    """
+
+    dependencies = [
+        ('core', '0013_importcheckpoint'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql='CREATE INDEX road_segment_geog_idx ON core_road USING GIST ((segment::geography));',
+            reverse_sql='DROP INDEX IF EXISTS road_segment_geog_idx;',
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 3.2.25 on 2026-10-18 14:40
+
+import django.contrib.gis.db.models.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_road_segment_geog_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='road',
+            name='segment_fine',
+            field=django.contrib.gis.db.models.fields.LineStringField(blank=True, editable=False, null=True, spatial_index=False, srid=4326),
+        ),
+        migrations.AddField(
+            model_name='road',
+            name='segment_medium',
+            field=django.contrib.gis.db.models.fields.LineStringField(blank=True, editable=False, null=True, spatial_index=False, srid=4326),
+        ),
+        migrations.AddField(
+            model_name='road',
+            name='segment_coarse',
+            field=django.contrib.gis.db.models.fields.LineStringField(blank=True, editable=False, null=True, spatial_index=False, srid=4326),
+        ),
+        migrations.RunSQL(
+            sql="""
+                UPDATE core_road SET
+                    segment_fine = ST_SimplifyPreserveTopology(segment, 0.00005),
+                    segment_medium = ST_SimplifyPreserveTopology(segment, 0.0005),
+                    segment_coarse = ST_SimplifyPreserveTopology(segment, 0.005);
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
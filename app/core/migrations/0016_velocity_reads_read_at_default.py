@@ -0,0 +1,19 @@
+# Generated by Django 3.2.25 on 2026-10-18 16:05
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_road_simplified_segments'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='velocity_reads',
+            name='read_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
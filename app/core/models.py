@@ -2,8 +2,21 @@
 Database models.
 """
 
+from datetime import datetime, timezone as dt_timezone
+
 from django.conf import settings
-from django.db import models
+from django.db import connection, models, transaction
+from django.db.models import (
+    Case,
+    Count,
+    F,
+    OuterRef,
+    Subquery,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from django.contrib.auth.models import (
     AbstractBaseUser,
     BaseUserManager,
@@ -11,6 +24,8 @@ from django.contrib.auth.models import (
 )
 from django.contrib.gis.db import models as gis_models
 
+from core.tiles import invalidate_road_tiles, invalidate_tiles
+
 
 class UserManager(BaseUserManager):
     """
@@ -60,6 +75,152 @@ class User(AbstractBaseUser, PermissionsMixin):
         return self.email
 
 
+def _road_read_subqueries():
+    """Return the correlated read count and latest read subqueries for a road."""
+    reads = Velocity_Reads.objects.filter(road=OuterRef('pk'))
+    total = reads.order_by().values('road').annotate(total=Count('id')).values('total')
+    latest = reads.order_by('-read_at', '-id')
+    return total, latest
+
+
+class RoadQuerySet(models.QuerySet):
+    """
+    QuerySet for roads.
+    """
+
+    def with_read_state(self, from_reads=False):
+        """
+        Annotate reads_count, latest_read_value and intensity_class in SQL.
+        With from_reads the state is computed from Velocity_Reads instead of
+        the denormalized columns.
+        """
+        if from_reads:
+            total, latest = _road_read_subqueries()
+            queryset = self.annotate(
+                reads_count=Coalesce(Subquery(total), 0),
+                latest_read_value=Subquery(latest.values('read_value')[:1]),
+            )
+        else:
+            queryset = self.annotate(
+                reads_count=F('total_reads'),
+                latest_read_value=F('last_read_value'),
+            )
+
+        from core.thresholds import get_thresholds
+
+        thresholds = get_thresholds()
+        if thresholds is None:
+            return queryset.annotate(
+                intensity_class=Value(None, output_field=models.CharField())
+            )
+        return queryset.annotate(
+            intensity_class=Case(
+                When(latest_read_value__isnull=True, then=Value(None)),
+                When(latest_read_value__lt=thresholds.min_value, then=Value('baixa')),
+                When(latest_read_value__lt=thresholds.max_value, then=Value('media')),
+                default=Value('alta'),
+                output_field=models.CharField(),
+            )
+        )
+
+
+def _intensity_changed(changes):
+    """Return the ids of the (road id, old value, new value) whose intensity class changed."""
+    from core.thresholds import get_thresholds, intensity_class
+
+    thresholds = get_thresholds()
+    return [
+        road_id
+        for road_id, old, new in changes
+        if intensity_class(old, thresholds) != intensity_class(new, thresholds)
+    ]
+
+
+class RoadManager(models.Manager.from_queryset(RoadQuerySet)):
+    """
+    Manager for roads, keeps the denormalized read state in sync.
+    """
+
+    def record_reads(self, reads):
+        """
+        Fold newly created velocity reads into the state of their roads.
+        Bulk inserts skip the model signals, so they must call this directly.
+        """
+        per_road = {}
+        for read in reads:
+            count, latest = per_road.get(read.road_id, (0, None))
+            if latest is None or (read.read_at, read.pk) > (latest.read_at, latest.pk):
+                latest = read
+            per_road[read.road_id] = (count + 1, latest)
+
+        if not per_road:
+            return
+
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        placeholders = ', '.join(['(%s, %s, %s::numeric, %s::timestamptz)'] * len(per_road))
+        params = [
+            p
+            for road_id, (count, latest) in per_road.items()
+            for p in (road_id, count, latest.read_value, latest.read_at)
+        ]
+        with connection.cursor() as cursor:
+            # the roads are locked in id order, so concurrent batches can not deadlock
+            cursor.execute(
+                f"""
+                WITH locked AS (
+                    SELECT id, last_read_value FROM {table}
+                    WHERE id = ANY(%s) ORDER BY id FOR UPDATE
+                )
+                UPDATE {table} AS r SET
+                    total_reads = r.total_reads + v.read_count,
+                    last_read_value = CASE
+                        WHEN r.last_read_at IS NULL OR r.last_read_at <= v.read_at
+                        THEN v.read_value ELSE r.last_read_value END,
+                    last_read_at = CASE
+                        WHEN r.last_read_at IS NULL OR r.last_read_at <= v.read_at
+                        THEN v.read_at ELSE r.last_read_at END
+                FROM (VALUES {placeholders}) AS v (road_id, read_count, read_value, read_at)
+                JOIN locked ON locked.id = v.road_id
+                WHERE r.id = v.road_id
+                RETURNING r.id, locked.last_read_value, r.last_read_value
+                """,
+                [sorted(per_road), *params],
+            )
+            changes = cursor.fetchall()
+        invalidate_road_tiles(_intensity_changed(changes))
+
+    def refresh_read_state(self, road_ids=None):
+        """
+        Recompute the read state from Velocity_Reads, for all roads or the given ids.
+        """
+        total, latest = _road_read_subqueries()
+
+        queryset = self.get_queryset()
+        if road_ids is not None:
+            queryset = queryset.filter(pk__in=road_ids)
+
+        before = dict(queryset.values_list('id', 'last_read_value'))
+        updated = queryset.update(
+            total_reads=Coalesce(Subquery(total), 0),
+            last_read_value=Subquery(latest.values('read_value')[:1]),
+            last_read_at=Subquery(latest.values('read_at')[:1]),
+        )
+        after = queryset.values_list('id', 'last_read_value')
+        invalidate_road_tiles(_intensity_changed(
+            (road_id, before[road_id], value) for road_id, value in after
+        ))
+        return updated
+
+
+# Simplified variants of Road.segment, with their ST_SimplifyPreserveTopology
+# tolerance in degrees (roughly 5 m, 50 m and 500 m).
+SEGMENT_SIMPLIFICATIONS = {
+    'fine': 0.00005,
+    'medium': 0.0005,
+    'coarse': 0.005,
+}
+
+
 class Road(models.Model):
     """
     Road object.
@@ -67,6 +228,22 @@ class Road(models.Model):
     name = models.CharField(max_length=255)
     segment = gis_models.LineStringField()
     length = models.FloatField()
+    segment_fine = gis_models.LineStringField(
+        null=True, blank=True, editable=False, spatial_index=False
+    )
+    segment_medium = gis_models.LineStringField(
+        null=True, blank=True, editable=False, spatial_index=False
+    )
+    segment_coarse = gis_models.LineStringField(
+        null=True, blank=True, editable=False, spatial_index=False
+    )
+    total_reads = models.PositiveIntegerField(default=0, editable=False)
+    last_read_value = models.DecimalField(
+        max_digits=5, decimal_places=2, null=True, blank=True, editable=False
+    )
+    last_read_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = RoadManager()
 
     class Meta:
         constraints = [ models.UniqueConstraint(
@@ -74,23 +251,263 @@ class Road(models.Model):
             name = 'unique_road'
         ),
         ]
+        indexes = [
+            models.Index(fields=['last_read_value'], name='road_last_read_value_idx'),
+        ]
 
     def __str__(self):
         """Return string representation of our Road"""
         return f"Road {self.id} ({self.segment})"
 
+    def simplify_segment(self):
+        """
+        Recompute the simplified segment variants. Called by save(), bulk
+        inserts must call it themselves.
+        """
+        for variant, tolerance in SEGMENT_SIMPLIFICATIONS.items():
+            simplified = None
+            if self.segment is not None:
+                simplified = self.segment.simplify(tolerance, preserve_topology=True)
+            setattr(self, f'segment_{variant}', simplified)
+
+    def save(self, *args, **kwargs):
+        """Save the road, keeping the simplified segments in sync."""
+        self.simplify_segment()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'segment' in update_fields:
+            kwargs['update_fields'] = {
+                *update_fields, *(f'segment_{v}' for v in SEGMENT_SIMPLIFICATIONS)
+            }
+        super().save(*args, **kwargs)
+
+
+class VelocityReadsQuerySet(models.QuerySet):
+    """QuerySet for velocity reads."""
+
+    def delete(self):
+        """
+        Delete the reads, then recompute the read state of their roads once.
+        This is done here rather than in a delete signal so a cascade from a
+        deleted Road stays a single fast DELETE instead of loading every read.
+        """
+        road_ids = set(self.order_by().values_list('road_id', flat=True).distinct())
+        with transaction.atomic():
+            deleted = super().delete()
+            Road.objects.refresh_read_state(road_ids)
+        return deleted
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+
+class VelocityReadsManager(models.Manager.from_queryset(VelocityReadsQuerySet)):
+    """
+    Manager for velocity reads.
+    """
+
+    def bulk_ingest(self, reads, batch_size=1000):
+        """
+        Insert unsaved reads with bulk_create in one transaction and fold them
+        into the road state and speed rollups, which the signals would skip.
+        """
+        with transaction.atomic():
+            reads = self.bulk_create(reads, batch_size=batch_size)
+            Road.objects.record_reads(reads)
+            RoadSpeedRollup.objects.record_reads(reads)
+        return reads
+
 
 class Velocity_Reads(models.Model):
     """Velocity-Reads object."""
     road = models.ForeignKey(Road,on_delete=models.CASCADE, related_name='velocity_reads')
     read_value=models.DecimalField(max_digits=5, decimal_places=2)
-    read_at = models.DateTimeField(auto_now_add=True)
+    # a default rather than auto_now_add, so queued reads keep their acceptance time
+    read_at = models.DateTimeField(default=timezone.now, editable=False)
+
+    objects = VelocityReadsManager()
+
+    class Meta:
+        indexes = [
+            # latest read per road
+            models.Index(fields=['road', 'read_at', 'id'], name='vreads_road_read_at_idx'),
+            # time ordered listing and keyset pagination
+            models.Index(fields=['read_at', 'id'], name='vreads_read_at_id_idx'),
+        ]
+
+    def delete(self, *args, **kwargs):
+        """Delete the read and recompute the read state of its road."""
+        with transaction.atomic():
+            deleted = super().delete(*args, **kwargs)
+            Road.objects.refresh_read_state([self.road_id])
+        return deleted
 
     def __str__(self):
         """Return a string visualization of our read."""
         return f"Read {self.read_value} at {self.road}"
 
 
+ROLLUP_BUCKETS = {
+    '5m': 5 * 60,
+    '1h': 60 * 60,
+    '1d': 24 * 60 * 60,
+}
+
+
+def bucket_start(moment, bucket):
+    """Return the start of the rollup bucket containing moment (epoch aligned, UTC)."""
+    size = ROLLUP_BUCKETS[bucket]
+    return datetime.fromtimestamp(moment.timestamp() // size * size, tz=dt_timezone.utc)
+
+
+class RoadSpeedRollupManager(models.Manager):
+    """
+    Manager for speed rollups, maintained incrementally with SQL upserts.
+    """
+
+    def record_reads(self, reads):
+        """
+        Fold newly created velocity reads into every rollup bucket.
+        Bulk inserts skip the model signals, so they must call this directly.
+        """
+        rows = {}
+        for read in reads:
+            value = read.read_value
+            for bucket in ROLLUP_BUCKETS:
+                key = (read.road_id, bucket, bucket_start(read.read_at, bucket))
+                if key in rows:
+                    count, low, high, total, squares = rows[key]
+                    rows[key] = (
+                        count + 1, min(low, value), max(high, value),
+                        total + value, squares + value * value,
+                    )
+                else:
+                    rows[key] = (1, value, value, value, value * value)
+        if not rows:
+            return
+
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        placeholders = ', '.join(['(%s, %s, %s, %s, %s, %s, %s, %s)'] * len(rows))
+        # sorted keys give a fixed lock order, so concurrent batches can not deadlock
+        params = [p for key, stats in sorted(rows.items()) for p in (*key, *stats)]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {table} AS r (
+                    road_id, bucket, bucket_start, read_count,
+                    min_value, max_value, sum_value, sum_squares
+                )
+                VALUES {placeholders}
+                ON CONFLICT (road_id, bucket, bucket_start) DO UPDATE SET
+                    read_count = r.read_count + EXCLUDED.read_count,
+                    min_value = LEAST(r.min_value, EXCLUDED.min_value),
+                    max_value = GREATEST(r.max_value, EXCLUDED.max_value),
+                    sum_value = r.sum_value + EXCLUDED.sum_value,
+                    sum_squares = r.sum_squares + EXCLUDED.sum_squares
+                """,
+                params,
+            )
+
+    def rebuild(self, buckets=None, road_ids=None, since=None, until=None):
+        """
+        Recompute the rollups from Velocity_Reads, optionally limited to some
+        buckets, roads and a [since, until) window widened to whole buckets.
+        """
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        reads_table = connection.ops.quote_name(Velocity_Reads._meta.db_table)
+        rebuilt = 0
+        with transaction.atomic(), connection.cursor() as cursor:
+            for bucket in buckets or ROLLUP_BUCKETS:
+                size = ROLLUP_BUCKETS[bucket]
+                conditions, params = [], []
+                if road_ids is not None:
+                    conditions.append('road_id = ANY(%s)')
+                    params.append(list(road_ids))
+                if since is not None:
+                    conditions.append('{column} >= %s')
+                    params.append(bucket_start(since, bucket))
+                if until is not None:
+                    end = bucket_start(until, bucket)
+                    if end < until:
+                        end = datetime.fromtimestamp(end.timestamp() + size, tz=dt_timezone.utc)
+                    conditions.append('{column} < %s')
+                    params.append(end)
+
+                where = ' AND '.join(conditions) or 'TRUE'
+                cursor.execute(
+                    f"DELETE FROM {table} WHERE bucket = %s AND {where.format(column='bucket_start')}",
+                    [bucket, *params],
+                )
+                cursor.execute(
+                    f"""
+                    INSERT INTO {table} (
+                        road_id, bucket, bucket_start, read_count,
+                        min_value, max_value, sum_value, sum_squares
+                    )
+                    SELECT
+                        road_id,
+                        %s,
+                        to_timestamp(floor(extract(epoch FROM read_at) / %s) * %s) AS start,
+                        count(*),
+                        min(read_value),
+                        max(read_value),
+                        sum(read_value),
+                        sum(read_value * read_value)
+                    FROM {reads_table}
+                    WHERE {where.format(column='read_at')}
+                    GROUP BY road_id, start
+                    """,
+                    [bucket, size, size, *params],
+                )
+                rebuilt += cursor.rowcount
+        return rebuilt
+
+
+class RoadSpeedRollup(models.Model):
+    """
+    Speed aggregates of a road over a time bucket.
+    """
+
+    road = models.ForeignKey(Road, on_delete=models.CASCADE, related_name='speed_rollups')
+    bucket = models.CharField(
+        max_length=2, choices=[(bucket, bucket) for bucket in ROLLUP_BUCKETS]
+    )
+    bucket_start = models.DateTimeField()
+    read_count = models.PositiveIntegerField()
+    min_value = models.DecimalField(max_digits=5, decimal_places=2)
+    max_value = models.DecimalField(max_digits=5, decimal_places=2)
+    sum_value = models.DecimalField(max_digits=16, decimal_places=2)
+    sum_squares = models.DecimalField(max_digits=20, decimal_places=4)
+
+    objects = RoadSpeedRollupManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['road', 'bucket', 'bucket_start'], name='unique_road_speed_rollup'
+            ),
+        ]
+
+    def __str__(self):
+        return f"Rollup {self.bucket} of road {self.road_id} at {self.bucket_start}"
+
+
+class ClassificationQuerySet(models.QuerySet):
+    """
+    QuerySet for classifications.
+    """
+
+    def update(self, **kwargs):
+        """Update the classifications and drop the cached thresholds and tiles, as the signals do on save."""
+        from core.thresholds import invalidate_thresholds
+
+        updated = super().update(**kwargs)
+        invalidate_thresholds()
+        invalidate_tiles()
+        return updated
+
+    update.alters_data = True
+
+
 class Classification(models.Model):
     """
     Classification object.
@@ -99,6 +516,8 @@ class Classification(models.Model):
     min_value = models.DecimalField(max_digits=5, decimal_places=2)
     max_value = models.DecimalField(max_digits=5, decimal_places=2)
 
+    objects = ClassificationQuerySet.as_manager()
+
 
     def __str__(self):
         return f"{self.id}: min_value: {self.min_value} , max_value: {self.max_value}"
@@ -137,6 +556,29 @@ class Plates_Reads(models.Model):
     sensor = models.ForeignKey(Sensor, on_delete=models.PROTECT)
     read_at = models.DateTimeField()
 
+    class Meta:
+        indexes = [
+            # pass-by lookups of a car over a time window
+            models.Index(fields=['car_plate', 'read_at'], name='preads_car_read_at_idx'),
+            # time ordered listing and keyset pagination
+            models.Index(fields=['read_at', 'id'], name='preads_read_at_id_idx'),
+        ]
+
     def __str__(self):
         return f"Read {self.car_plate} by {self.sensor} at {self.read_at}"
 
+
+
+class ImportCheckpoint(models.Model):
+    """
+    Progress of a file import, committed together with each imported chunk.
+    """
+
+    path = models.CharField(max_length=1024, unique=True)
+    byte_offset = models.BigIntegerField(default=0)
+    rows = models.PositiveBigIntegerField(default=0)
+    completed = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Import of {self.path}: {self.rows} rows, byte {self.byte_offset}"
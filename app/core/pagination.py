@@ -0,0 +1,174 @@
+"""
+Pagination classes shared by the API apps.
+"""
+
+from base64 import b64decode, b64encode
+from collections import OrderedDict
+from urllib import parse
+
+from django.db import connection
+from django.db.models import BooleanField
+from django.db.models.expressions import RawSQL
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset pagination over (read_at, id), newest first.
+    Each page is a range scan after the cursor position, so its cost does not
+    depend on how deep it is and no COUNT(*) is issued.
+    """
+
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'limit'
+    max_page_size = 1000
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        reverse, position = self.decode_cursor(request)
+
+        queryset = self.apply_cursor(queryset, reverse, position)
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+
+        if reverse:
+            results.reverse()
+            has_previous, has_next = has_more, position is not None
+        else:
+            has_previous, has_next = position is not None, has_more
+
+        self.previous_position = self.get_position(results[0]) if has_previous and results else None
+        self.next_position = self.get_position(results[-1]) if has_next and results else None
+        return results
+
+    @staticmethod
+    def apply_cursor(queryset, reverse, position):
+        """
+        Order queryset by (read_at, id) and keep the rows after position.
+        The row comparison, plus a plain bound on read_at for partition
+        pruning, is an index range condition, so the scan starts at the cursor
+        instead of filtering every newer row.
+        """
+        if reverse:
+            queryset = queryset.order_by('read_at', 'id')
+        else:
+            queryset = queryset.order_by('-read_at', '-id')
+        if not position:
+            return queryset
+
+        read_at, pk = position
+        table = connection.ops.quote_name(queryset.model._meta.db_table)
+        after = RawSQL(
+            f'({table}."read_at", {table}."id") {">" if reverse else "<"} (%s, %s)',
+            (read_at, pk),
+            output_field=BooleanField(),
+        )
+        if reverse:
+            return queryset.filter(after, read_at__gte=read_at)
+        return queryset.filter(after, read_at__lte=read_at)
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size,
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def get_position(self, item):
+        """Return the (read_at, id) key of a model instance or values() row."""
+        if isinstance(item, dict):
+            return item['read_at'], item['id']
+        return item.read_at, item.pk
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return False, None
+
+        try:
+            querystring = b64decode(encoded.encode('ascii')).decode('ascii')
+            tokens = parse.parse_qs(querystring, keep_blank_values=True)
+            reverse = bool(int(tokens.get('r', ['0'])[0]))
+            read_at = parse_datetime(tokens['t'][0])
+            pk = int(tokens['i'][0])
+        except (TypeError, ValueError, KeyError, IndexError):
+            raise NotFound(self.invalid_cursor_message)
+        if read_at is None:
+            raise NotFound(self.invalid_cursor_message)
+        return reverse, (read_at, pk)
+
+    def encode_cursor(self, reverse, position):
+        read_at, pk = position
+        tokens = {'t': read_at.isoformat(), 'i': pk}
+        if reverse:
+            tokens['r'] = '1'
+        querystring = parse.urlencode(tokens, doseq=True)
+        encoded = b64encode(querystring.encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return self.encode_cursor(False, self.next_position)
+
+    def get_previous_link(self):
+        if self.previous_position is None:
+            return None
+        return self.encode_cursor(True, self.previous_position)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+
+class KeysetPaginationMixin:
+    """
+    Let clients opt into KeysetPagination per request with ?pagination=cursor
+    (or by following a cursor link), keeping the default pagination otherwise.
+    """
+
+    keyset_pagination_class = KeysetPagination
+    pagination_query_param = 'pagination'
+
+    def use_keyset_pagination(self):
+        request = getattr(self, 'request', None)
+        if request is None:
+            return False
+        params = request.query_params
+        return (
+            params.get(self.pagination_query_param) == 'cursor'
+            or self.keyset_pagination_class.cursor_query_param in params
+        )
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator') and self.use_keyset_pagination():
+            self._paginator = self.keyset_pagination_class()
+        return super().paginator
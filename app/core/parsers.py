@@ -0,0 +1,51 @@
+"""
+JSON parser backed by orjson.
+"""
+
+import json
+import re
+
+import orjson
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+# orjson turns integers outside [-2**63, 2**64) into floats, they need 19+ digits.
+LONG_NUMBER = re.compile(rb'\d{19}')
+
+
+def exact_int(literal):
+    """Parse an integer literal, rejecting the ones orjson would turn into floats."""
+    value = int(literal)
+    if not -2 ** 63 <= value < 2 ** 64:
+        raise ValueError(f'Integer {literal} exceeds the 64-bit range')
+    return value
+
+
+def reject_constant(constant):
+    """Reject NaN and Infinity, which orjson and DRF's strict JSONParser refuse too."""
+    raise ValueError(f'{constant} is not valid JSON')
+
+
+class ORJSONParser(BaseParser):
+    """
+    Drop-in replacement for DRF's JSONParser. Bodies with integers past the
+    64-bit range are rejected instead of being parsed into lossy floats.
+    """
+
+    media_type = 'application/json'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+
+        try:
+            body = stream.read()
+            if encoding.lower().replace('-', '') != 'utf8':
+                body = body.decode(encoding).encode()
+            if LONG_NUMBER.search(body):
+                # rare: let the stdlib parser check every integer exactly
+                return json.loads(body, parse_int=exact_int, parse_constant=reject_constant)
+            return orjson.loads(body)
+        except (ValueError, UnicodeDecodeError) as exc:
+            raise ParseError(f'JSON parse error - {exc}')
@@ -0,0 +1,153 @@
+"""
+Range partition management for the time series read tables.
+"""
+
+import re
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db import connection, transaction
+from django.utils.dateparse import parse_datetime
+
+from core.models import Plates_Reads, Velocity_Reads
+
+PARTITIONED_MODELS = (Velocity_Reads, Plates_Reads)
+PARTITION_KEY = 'read_at'
+INTERVALS = ('day', 'week', 'month')
+
+BOUND_RE = re.compile(r"FROM \('(?P<start>[^']+)'\) TO \('(?P<end>[^']+)'\)")
+
+
+def floor_bound(moment, interval):
+    """Return the start of the interval containing moment, in UTC."""
+    moment = moment.astimezone(dt_timezone.utc)
+    start = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if interval == 'week':
+        start -= timedelta(days=start.weekday())
+    elif interval == 'month':
+        start = start.replace(day=1)
+    return start
+
+
+def next_bound(start, interval):
+    """Return the start of the interval following the one starting at start."""
+    if interval == 'day':
+        return start + timedelta(days=1)
+    if interval == 'week':
+        return start + timedelta(weeks=1)
+    if start.month == 12:
+        return start.replace(year=start.year + 1, month=1)
+    return start.replace(month=start.month + 1)
+
+
+def shift_bound(start, interval, count):
+    """Move an interval start count intervals forwards (or backwards)."""
+    if interval == 'month':
+        month = start.year * 12 + start.month - 1 + count
+        return start.replace(year=month // 12, month=month % 12 + 1)
+    step = timedelta(days=1) if interval == 'day' else timedelta(weeks=1)
+    return start + step * count
+
+
+def partition_name(table, start):
+    return f'{table}_p{start:%Y%m%d}'
+
+
+def list_partitions(table):
+    """Return {name: (start, end)} for the range partitions of table."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+            FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = %s::regclass
+            """,
+            [table],
+        )
+        rows = cursor.fetchall()
+
+    partitions = {}
+    for name, bound in rows:
+        match = BOUND_RE.search(bound)
+        if match:  # the DEFAULT partition has no range
+            partitions[name] = (
+                parse_datetime(match.group('start')),
+                parse_datetime(match.group('end')),
+            )
+    return partitions
+
+
+def create_partition(table, start, end):
+    """
+    Create and attach the partition [start, end) of table. Rows of that range
+    already sitting in the default partition are moved into it first.
+    """
+    name = partition_name(table, start)
+    qn = connection.ops.quote_name
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE TABLE {qn(name)} (LIKE {qn(table)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+        )
+        cursor.execute(
+            f"""
+            WITH moved AS (
+                DELETE FROM {qn(table + '_default')}
+                WHERE {PARTITION_KEY} >= %s AND {PARTITION_KEY} < %s
+                RETURNING *
+            )
+            INSERT INTO {qn(name)} SELECT * FROM moved
+            """,
+            [start, end],
+        )
+        cursor.execute(
+            f'ALTER TABLE {qn(table)} ATTACH PARTITION {qn(name)} FOR VALUES FROM (%s) TO (%s)',
+            [start, end],
+        )
+    return name
+
+
+def detach_partition(table, name, drop=False):
+    """Detach a partition from table, dropping it if asked. Both are O(1)."""
+    qn = connection.ops.quote_name
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE {qn(table)} DETACH PARTITION {qn(name)}')
+        if drop:
+            cursor.execute(f'DROP TABLE {qn(name)}')
+
+
+def ensure_partitions(table, interval, ahead, since=None, now=None):
+    """
+    Create the missing partitions of table from since (default: the current
+    interval) up to ahead intervals in the future. Returns the created names.
+    """
+    now = now or datetime.now(dt_timezone.utc)
+    current = floor_bound(now, interval)
+    start = floor_bound(since, interval) if since else current
+    stop = shift_bound(current, interval, ahead + 1)
+
+    existing = list_partitions(table).values()
+    created = []
+    while start < stop:
+        end = next_bound(start, interval)
+        if not _overlaps(start, end, existing):
+            created.append(create_partition(table, start, end))
+        start = end
+    return created
+
+
+def expire_partitions(table, interval, retention, drop=False, now=None):
+    """
+    Detach (or drop) the partitions of table ending before the last retention
+    intervals. Returns the expired names.
+    """
+    now = now or datetime.now(dt_timezone.utc)
+    cutoff = shift_bound(floor_bound(now, interval), interval, -retention)
+    expired = []
+    for name, (_, end) in sorted(list_partitions(table).items()):
+        if end <= cutoff:
+            detach_partition(table, name, drop=drop)
+            expired.append(name)
+    return expired
+
+
+def _overlaps(start, end, ranges):
+    return any(start < other_end and other_start < end for other_start, other_end in ranges)
@@ -1,7 +1,67 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
 from rest_framework.permissions import BasePermission, SAFE_METHODS
+from rest_framework_api_key.permissions import HasAPIKey
+
+API_KEY_CACHE_PREFIX = 'core:api-key:'
+
 
 class IsAdminOrReadOnly(BasePermission):
     def has_permission(self, request, view):
         if request.method in SAFE_METHODS:  # GET, HEAD, OPTIONS
             return True
-        return request.user and request.user.is_staff
\ No newline at end of file
+        return request.user and request.user.is_staff
+
+
+def api_key_digest(key):
+    """Keyed blake2b digest of a presented API key, never stored in clear."""
+    return hashlib.blake2b(
+        key.encode(), digest_size=32, key=settings.SECRET_KEY.encode()[:64]
+    ).hexdigest()
+
+
+def _digests_key(pk):
+    return f'{API_KEY_CACHE_PREFIX}digests:{pk}'
+
+
+class CachedHasAPIKey(HasAPIKey):
+    """
+    HasAPIKey that remembers successful verifications for API_KEY_CACHE_TTL
+    seconds (never past the key expiry), so the password hasher only runs
+    once per key and TTL instead of on every request.
+    """
+
+    def has_permission(self, request, view):
+        key = self.get_key(request)
+        if not key:
+            return False
+
+        digest = api_key_digest(key)
+        if cache.get(API_KEY_CACHE_PREFIX + digest) is not None:
+            return True
+
+        try:
+            api_key = self.model.objects.get_from_key(key)
+        except self.model.DoesNotExist:
+            return False
+        if api_key.has_expired:
+            return False
+
+        timeout = settings.API_KEY_CACHE_TTL
+        if api_key.expiry_date is not None:
+            timeout = min(timeout, int((api_key.expiry_date - timezone.now()).total_seconds()))
+        if timeout > 0:
+            # the digests of each key are indexed so a revocation can drop them
+            digests = cache.get(_digests_key(api_key.pk), set())
+            cache.set(_digests_key(api_key.pk), digests | {digest}, settings.API_KEY_CACHE_TTL)
+            cache.set(API_KEY_CACHE_PREFIX + digest, api_key.pk, timeout)
+        return True
+
+
+def invalidate_api_key(pk):
+    """Forget the cached verifications of an API key."""
+    digests = cache.get(_digests_key(pk), set())
+    cache.delete_many([API_KEY_CACHE_PREFIX + d for d in digests] + [_digests_key(pk)])
@@ -0,0 +1,71 @@
+"""
+JSON renderer backed by orjson.
+"""
+
+import datetime
+import decimal
+import json
+
+import orjson
+from django.contrib.gis.geos import GEOSGeometry
+from django.db.models.query import QuerySet
+from django.utils.encoding import force_str
+from django.utils.functional import Promise
+from rest_framework.renderers import BaseRenderer
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+
+
+def default(obj):
+    """
+    Encode what orjson does not handle natively the way DRF's JSONEncoder does,
+    plus GEOS geometries as GeoJSON.
+    """
+    if isinstance(obj, Promise):
+        return force_str(obj)
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, datetime.timedelta):
+        return str(obj.total_seconds())
+    if isinstance(obj, GEOSGeometry):
+        return json.loads(obj.geojson)
+    if isinstance(obj, QuerySet):
+        return tuple(obj)
+    if isinstance(obj, bytes):
+        return obj.decode()
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    if hasattr(obj, '__getitem__'):
+        try:
+            return dict(obj)
+        except (TypeError, ValueError):
+            pass
+    if hasattr(obj, '__iter__'):
+        return tuple(obj)
+    raise TypeError(f'Type {type(obj).__name__} is not JSON serializable')
+
+
+class ORJSONRenderer(BaseRenderer):
+    """
+    Drop-in replacement for DRF's JSONRenderer. An indent in the accepted media
+    type or renderer context (as the browsable API asks for) pretty prints.
+    Unlike JSONRenderer, which raises on them, NaN and Infinity render as null.
+    """
+
+    media_type = 'application/json'
+    format = 'json'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        options = ORJSON_OPTIONS
+        if self.get_indent(accepted_media_type or '', renderer_context or {}):
+            options |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, default=default, option=options)
+
+    def get_indent(self, accepted_media_type, renderer_context):
+        if 'indent=' in accepted_media_type:
+            return True
+        return bool(renderer_context.get('indent'))
@@ -0,0 +1,90 @@
+"""
+Signal handlers for core models.
+"""
+
+from django.db.models.signals import (
+    post_delete,
+    post_save,
+    pre_save,
+)
+from django.contrib.auth import get_user_model
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+from rest_framework_api_key.models import APIKey
+
+from core.models import (
+    Classification,
+    Road,
+    RoadSpeedRollup,
+    Velocity_Reads,
+)
+from core.authentication import invalidate_token, invalidate_user_tokens
+from core.permissions import invalidate_api_key
+from core.thresholds import invalidate_thresholds
+from core.tiles import invalidate_tiles
+
+
+@receiver(pre_save, sender=Velocity_Reads)
+def remember_previous_road(sender, instance, **kwargs):
+    """Keep the road an existing read belonged to before it is updated."""
+    if instance.pk is None:
+        instance._previous_road_id = None
+        return
+    instance._previous_road_id = (
+        sender.objects.filter(pk=instance.pk).values_list('road_id', flat=True).first()
+    )
+
+
+@receiver(post_save, sender=Velocity_Reads)
+def update_road_state_on_save(sender, instance, created, raw=False, **kwargs):
+    """
+    Keep the road read state in sync with created or edited reads
+    (deletes are handled by Velocity_Reads.delete and its queryset).
+    Speed rollups only accumulate new reads, rebuild_rollups repairs them
+    after edits or deletes.
+    """
+    if raw:
+        return
+    if created:
+        Road.objects.record_reads([instance])
+        RoadSpeedRollup.objects.record_reads([instance])
+        return
+
+    road_ids = {instance.road_id, getattr(instance, '_previous_road_id', None)}
+    road_ids.discard(None)
+    Road.objects.refresh_read_state(road_ids)
+
+
+@receiver(post_save, sender=Classification)
+@receiver(post_delete, sender=Classification)
+def invalidate_classification_cache(sender, **kwargs):
+    """Drop the cached thresholds and tiles whenever a classification changes."""
+    invalidate_thresholds()
+    invalidate_tiles()
+
+
+@receiver(post_save, sender=Road)
+@receiver(post_delete, sender=Road)
+def invalidate_road_tiles(sender, **kwargs):
+    """Drop the cached road tiles whenever a road changes."""
+    invalidate_tiles()
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_cached_token(sender, instance, **kwargs):
+    """Stop accepting a deleted token from the authentication cache."""
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def invalidate_cached_user_tokens(sender, instance, **kwargs):
+    """Drop cached tokens of a changed user (deactivation, password change)."""
+    invalidate_user_tokens(instance.pk)
+
+
+@receiver(post_save, sender=APIKey)
+@receiver(post_delete, sender=APIKey)
+def invalidate_cached_api_key(sender, instance, **kwargs):
+    """Forget cached verifications of a changed (revoked, re-dated) or deleted API key."""
+    invalidate_api_key(instance.pk)
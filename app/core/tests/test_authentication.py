@@ -0,0 +1,76 @@
+"""
+Tests for the cached token authentication.
+"""
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+from core.authentication import CachedTokenAuthentication, token_cache
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """Test token resolutions are cached and invalidated."""
+
+    def setUp(self):
+        token_cache.clear()
+        self.user = get_user_model().objects.create_user('user@example.com', 'test123')
+        self.token = Token.objects.create(user=self.user)
+        self.auth = CachedTokenAuthentication()
+
+    def test_cached_resolution(self):
+        """Test only the first resolution of a token queries the database."""
+        user, token = self.auth.authenticate_credentials(self.token.key)
+
+        with self.assertNumQueries(0):
+            cached_user, _ = self.auth.authenticate_credentials(self.token.key)
+
+        self.assertEqual(user, self.user)
+        self.assertEqual(cached_user, self.user)
+
+    def test_cached_user_not_shared(self):
+        """Test every cached resolution gets its own user instance, without the permission caches."""
+        user, _ = self.auth.authenticate_credentials(self.token.key)
+        first, first_token = self.auth.authenticate_credentials(self.token.key)
+        first.has_perm('core.view_road')
+
+        with self.assertNumQueries(0):
+            second, second_token = self.auth.authenticate_credentials(self.token.key)
+
+        self.assertIsNot(first, second)
+        self.assertIs(second_token.user, second)
+        self.assertEqual(second, self.user)
+        self.assertFalse(hasattr(second, '_perm_cache'))
+
+    def test_invalid_token(self):
+        """Test unknown tokens are rejected."""
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.authenticate_credentials('unknown')
+
+    def test_token_deleted(self):
+        """Test a deleted token stops authenticating."""
+        self.auth.authenticate_credentials(self.token.key)
+        self.token.delete()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.authenticate_credentials(self.token.key)
+
+    def test_user_deactivated(self):
+        """Test the token of a deactivated user stops authenticating."""
+        self.auth.authenticate_credentials(self.token.key)
+        self.user.is_active = False
+        self.user.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.authenticate_credentials(self.token.key)
+
+    def test_password_changed(self):
+        """Test a password change evicts the cached resolution."""
+        self.auth.authenticate_credentials(self.token.key)
+        self.user.set_password('new-pass123')
+        self.user.save()
+
+        with self.assertNumQueries(1):
+            user, _ = self.auth.authenticate_credentials(self.token.key)
+        self.assertTrue(user.check_password('new-pass123'))
@@ -2,13 +2,29 @@
 Test custom Django managment commands.
 """
 
+import os
+import tempfile
+from decimal import Decimal
+from io import StringIO
 from unittest.mock import patch
 
 from psycopg2 import OperationalError as Psycopg2OpError
 
-from django.core.management import call_command
+from django.contrib.auth import get_user_model
+from django.contrib.gis.geos import LineString
+from django.core.management import CommandError, call_command
 from django.db.utils import OperationalError
-from django.test import SimpleTestCase
+from django.test import SimpleTestCase, TestCase
+
+from core.ingest_queue import IngestQueue
+from core.models import (
+    Classification,
+    ImportCheckpoint,
+    Road,
+    RoadSpeedRollup,
+    Sensor,
+    Velocity_Reads,
+)
 
 
 @patch("core.management.commands.wait_for_db.Command.check")
@@ -35,3 +51,141 @@ class CommandTests(SimpleTestCase):
 
         self.assertEqual(patched_check.call_count, 6)
         patched_check.assert_called_with(databases=["default"])
+
+
+class RefreshRoadStateTests(TestCase):
+    """Test the road read state repair command."""
+
+    def test_refresh_road_state(self):
+        """Test the command repairs a drifted read state."""
+        road = Road.objects.create(
+            segment=LineString((103.9460064, 30.75066046), (103.9564943, 30.7450801)),
+            length=1179.2,
+        )
+        read = Velocity_Reads.objects.create(road=road, read_value=Decimal('20.05'))
+        Road.objects.filter(pk=road.pk).update(
+            total_reads=0, last_read_value=None, last_read_at=None
+        )
+
+        call_command("refresh_road_state")
+
+        road.refresh_from_db()
+        self.assertEqual(road.total_reads, 1)
+        self.assertEqual(road.last_read_value, read.read_value)
+        self.assertEqual(road.last_read_at, read.read_at)
+
+
+class RebuildRollupsTests(TestCase):
+    """Test the speed rollups rebuild command."""
+
+    def test_rebuild_rollups(self):
+        """Test the command recomputes the rollups, including after deletes."""
+        road = Road.objects.create(
+            segment=LineString((103.9460064, 30.75066046), (103.9564943, 30.7450801)),
+            length=1179.2,
+        )
+        Velocity_Reads.objects.create(road=road, read_value=Decimal('20'))
+        Velocity_Reads.objects.create(road=road, read_value=Decimal('40')).delete()
+        self.assertEqual(RoadSpeedRollup.objects.get(bucket='1d').read_count, 2)
+
+        call_command("rebuild_rollups")
+
+        self.assertEqual(RoadSpeedRollup.objects.count(), 3)
+        rollup = RoadSpeedRollup.objects.get(bucket='1d')
+        self.assertEqual(rollup.read_count, 1)
+        self.assertEqual(rollup.max_value, Decimal('20'))
+
+
+class ImportRoadTests(TestCase):
+    """Test the resumable road import command."""
+
+    HEADER = b'ID,Long_start,Lat_start,Long_end,Lat_end,Length,Speed\n'
+    ROWS = [
+        b'1,103.9460064,30.75066046,103.9564943,30.7450801,1179.2,20.5\n',
+        b'2,103.9564943,30.7450801,103.9666,30.7401,980.4,35\n',
+    ]
+
+    def setUp(self):
+        get_user_model().objects.create_superuser('admin@example.com', 'test123')
+        Sensor.objects.create(name='sensor', uuid='270e4cc0-d454-4b42-8682-80e87c3d163c')
+        Classification.objects.create(min_value=Decimal('20'), max_value=Decimal('50'))
+
+        handle, self.path = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(handle, 'wb') as dataFile:
+            dataFile.write(self.HEADER + b''.join(self.ROWS))
+        self.addCleanup(os.remove, self.path)
+
+    def test_import_file(self):
+        """Test a file is imported and checkpointed as completed."""
+        call_command("import_road", files=[self.path], workers=1, batch_size=1)
+
+        self.assertEqual(Road.objects.count(), 2)
+        self.assertEqual(Velocity_Reads.objects.count(), 2)
+        road = Road.objects.get(name='Road 1')
+        self.assertEqual(road.segment.coords[0], (103.9460064, 30.75066046))
+        self.assertEqual(road.total_reads, 1)
+        checkpoint = ImportCheckpoint.objects.get()
+        self.assertTrue(checkpoint.completed)
+        self.assertEqual(checkpoint.rows, 2)
+        self.assertEqual(checkpoint.byte_offset, os.path.getsize(self.path))
+
+    def test_import_resume(self):
+        """Test an interrupted import only continues with --resume, from its checkpoint."""
+        call_command("import_road", files=[self.path], workers=1)
+        Velocity_Reads.objects.filter(road__name='Road 2').delete()
+        ImportCheckpoint.objects.update(
+            completed=False, rows=1, byte_offset=len(self.HEADER + self.ROWS[0])
+        )
+
+        with self.assertRaises(CommandError):
+            call_command("import_road", files=[self.path], workers=1)
+        call_command("import_road", files=[self.path], workers=1, resume=True)
+
+        self.assertEqual(Road.objects.count(), 2)
+        self.assertEqual(Velocity_Reads.objects.filter(road__name='Road 1').count(), 1)
+        self.assertEqual(Velocity_Reads.objects.filter(road__name='Road 2').count(), 1)
+        self.assertTrue(ImportCheckpoint.objects.get().completed)
+
+
+class DrainIngestQueueTests(TestCase):
+    """Test the ingestion queue drain command."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        path = os.path.join(self.tmp.name, 'queue.sqlite3')
+        override = self.settings(INGEST_QUEUE_PATH=path)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.queue = IngestQueue(path)
+
+    def test_drain_keeps_acceptance_time(self):
+        """Test queued reads are written with the time they were accepted at."""
+        road = Road.objects.create(
+            name='Road 1',
+            segment=LineString((103.9460064, 30.75066046), (103.9564943, 30.7450801)),
+            length=1179.2,
+        )
+        self.queue.put('velocity-reads', [
+            {'road': road.id, 'read_value': '20.05', 'read_at': '2026-01-01T10:00:00+00:00'},
+        ])
+
+        call_command("drain_ingest_queue", once=True, stdout=StringIO(), stderr=StringIO())
+
+        read = Velocity_Reads.objects.get(road=road)
+        self.assertEqual(read.read_at.isoformat(), '2026-01-01T10:00:00+00:00')
+        self.assertEqual(self.queue.depth(), 0)
+
+    def test_drain_buries_failing_entries(self):
+        """Test an entry that can not be flushed is set aside instead of stopping the worker."""
+        self.queue.put('unknown-kind', [{}])
+        self.queue.put('velocity-reads', [{'road': 999, 'read_value': '20'}])
+
+        call_command(
+            "drain_ingest_queue", once=True, interval=0, max_attempts=2,
+            stdout=StringIO(), stderr=StringIO(),
+        )
+
+        stats = self.queue.stats()
+        self.assertEqual(stats['depth'], 0)
+        self.assertEqual(stats['dead_entries'], 1)
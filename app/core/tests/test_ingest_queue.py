@@ -0,0 +1,66 @@
+"""
+Tests for the asynchronous ingestion queue.
+"""
+
+import os
+import tempfile
+
+from django.test import SimpleTestCase
+from rest_framework.test import APIRequestFactory
+
+from core.ingest_queue import IngestQueue, wants_async
+
+
+class IngestQueueTests(SimpleTestCase):
+    """Test the durable ingestion queue."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.queue = IngestQueue(os.path.join(self.tmp.name, 'var', 'queue.sqlite3'))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_put_and_claim(self):
+        """Test entries are claimed oldest first and counted by item."""
+        self.assertEqual(self.queue.put('a', [1, 2]), 2)
+        self.assertEqual(self.queue.put('b', [{'x': 'y'}]), 3)
+
+        entries = self.queue.claim(10)
+
+        self.assertEqual([(kind, items) for _, kind, items, _ in entries], [('a', [1, 2]), ('b', [{'x': 'y'}])])
+        self.assertEqual(self.queue.depth(), 3)
+
+    def test_claim_limit(self):
+        """Test a claim stops at max_items but always returns one entry."""
+        self.queue.put('a', [1, 2, 3])
+        self.queue.put('a', [4])
+
+        self.assertEqual(len(self.queue.claim(1)), 1)
+        self.assertEqual(len(self.queue.claim(4)), 2)
+
+    def test_ack(self):
+        """Test acknowledged entries leave the queue."""
+        self.queue.put('a', [1])
+        self.queue.put('a', [2, 3])
+        first = self.queue.claim(1)
+
+        self.queue.ack([pk for pk, *_ in first])
+
+        self.assertEqual(self.queue.stats()['depth'], 2)
+        self.assertEqual(self.queue.stats()['entries'], 1)
+        self.assertEqual(self.queue.claim(10)[0][2], [2, 3])
+
+    def test_survives_reopen(self):
+        """Test queued entries are kept by the file."""
+        self.queue.put('a', [1])
+
+        self.assertEqual(IngestQueue(self.queue.path).depth(), 1)
+
+    def test_wants_async(self):
+        """Test the Prefer header opts into the asynchronous mode."""
+        factory = APIRequestFactory()
+
+        self.assertTrue(wants_async(factory.post('/', HTTP_PREFER='wait=5, respond-async')))
+        self.assertFalse(wants_async(factory.post('/', HTTP_PREFER='return=minimal')))
+        self.assertFalse(wants_async(factory.post('/')))
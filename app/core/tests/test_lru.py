@@ -0,0 +1,65 @@
+"""
+Tests for the LRU cache.
+"""
+
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from core.lru import LRUCache
+
+
+class LRUCacheTests(SimpleTestCase):
+    """Test the bounded LRU cache."""
+
+    def test_get_set(self):
+        """Test values are returned and hits and misses counted."""
+        cache = LRUCache(maxsize=2)
+        cache.set('a', 1)
+
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.stats(), {'size': 1, 'maxsize': 2, 'hits': 1, 'misses': 1})
+
+    def test_evicts_least_recently_used(self):
+        """Test the least recently used entry is evicted when full."""
+        cache = LRUCache(maxsize=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 3)
+
+    @patch('core.lru.time.monotonic')
+    def test_ttl(self, patched_monotonic):
+        """Test entries expire after their ttl."""
+        patched_monotonic.return_value = 100
+        cache = LRUCache(maxsize=2, ttl=10)
+        cache.set('a', 1)
+
+        patched_monotonic.return_value = 109
+        self.assertEqual(cache.get('a'), 1)
+        patched_monotonic.return_value = 110
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(len(cache), 0)
+
+    def test_ttl_zero_disables(self):
+        """Test a ttl of 0 never stores anything."""
+        cache = LRUCache(maxsize=2, ttl=0)
+        cache.set('a', 1)
+
+        self.assertIsNone(cache.get('a'))
+
+    def test_delete_where(self):
+        """Test entries are dropped by predicate."""
+        cache = LRUCache(maxsize=5)
+        for key in range(4):
+            cache.set(key, key * 10)
+
+        cache.delete_where(lambda key, value: value >= 20)
+
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get(1), 10)
@@ -6,10 +6,13 @@ Testes for models.
 from decimal import Decimal
 
 from django.contrib.gis.geos import LineString
+from django.db import connection
 from django.test import TestCase   # base class for tests
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
 
 from core import models
+from core.thresholds import get_thresholds
 
 # helper function : get the user model
 def create_user(email='user@example.com',password='test123'):
@@ -111,4 +114,112 @@ class ModelTests(TestCase):
             name= "Test Sensor",
             uuid= "a3e86bd0-c19f-44e9-84c0-eadf4d4da197"
         )
-        self.assertEqual(str(sensor),f" Sensor {sensor.name}: uuid - {sensor.uuid}")
\ No newline at end of file
+        self.assertEqual(str(sensor),f" Sensor {sensor.name}: uuid - {sensor.uuid}")
+
+    def test_read_updates_road_state(self):
+        """
+        Test creating reads keeps the road total and last read in sync.
+        """
+        road = models.Road.objects.create(
+            segment=LineString(
+                (103.9460064, 30.75066046),
+                (103.9564943, 30.7450801)
+            ),
+            length=1179.207157,
+        )
+        models.Velocity_Reads.objects.create(road=road, read_value=Decimal('30.05'))
+        last = models.Velocity_Reads.objects.create(road=road, read_value=Decimal('45.10'))
+
+        road.refresh_from_db()
+        self.assertEqual(road.total_reads, 2)
+        self.assertEqual(road.last_read_value, last.read_value)
+        self.assertEqual(road.last_read_at, last.read_at)
+
+    def test_delete_read_updates_road_state(self):
+        """
+        Test deleting the last read falls back to the previous one.
+        """
+        road = models.Road.objects.create(
+            segment=LineString(
+                (103.9460064, 30.75066046),
+                (103.9564943, 30.7450801)
+            ),
+            length=1179.207157,
+        )
+        first = models.Velocity_Reads.objects.create(road=road, read_value=Decimal('30.05'))
+        last = models.Velocity_Reads.objects.create(road=road, read_value=Decimal('45.10'))
+        last.delete()
+
+        road.refresh_from_db()
+        self.assertEqual(road.total_reads, 1)
+        self.assertEqual(road.last_read_value, first.read_value)
+
+        first.delete()
+        road.refresh_from_db()
+        self.assertEqual(road.total_reads, 0)
+        self.assertIsNone(road.last_read_value)
+        self.assertIsNone(road.last_read_at)
+
+    def test_delete_reads_queryset_updates_road_state(self):
+        """
+        Test deleting reads in bulk refreshes the road state once.
+        """
+        road = models.Road.objects.create(
+            segment=LineString(
+                (103.9460064, 30.75066046),
+                (103.9564943, 30.7450801)
+            ),
+            length=1179.207157,
+        )
+        for value in ('30.05', '45.10', '50.00'):
+            models.Velocity_Reads.objects.create(road=road, read_value=Decimal(value))
+        models.Velocity_Reads.objects.filter(read_value__gt=40).delete()
+
+        road.refresh_from_db()
+        self.assertEqual(road.total_reads, 1)
+        self.assertEqual(road.last_read_value, Decimal('30.05'))
+
+    def test_delete_road_fast_deletes_reads(self):
+        """
+        Test the reads of a deleted road are removed without loading them.
+        """
+        def delete_queries(size):
+            road = models.Road.objects.create(
+                segment=LineString(
+                    (103.9460064, 30.75066046),
+                    (103.9564943, 30.7450801)
+                ),
+                length=1179.207157,
+            )
+            models.Velocity_Reads.objects.bulk_ingest([
+                models.Velocity_Reads(road=road, read_value=Decimal('30')) for _ in range(size)
+            ])
+            with CaptureQueriesContext(connection) as ctx:
+                road.delete()
+            self.assertFalse(models.Velocity_Reads.objects.filter(road_id=road.id).exists())
+            return len(ctx.captured_queries)
+
+        self.assertEqual(delete_queries(1), delete_queries(50))
+
+    def test_thresholds_cached_and_invalidated(self):
+        """
+        Test thresholds are served from the cache until a classification changes.
+        """
+        classification = models.Classification.objects.create(
+            min_value=Decimal('25'), max_value=Decimal('50')
+        )
+        get_thresholds()
+
+        with self.assertNumQueries(0):
+            thresholds = get_thresholds()
+        self.assertEqual(thresholds.min_value, Decimal('25'))
+
+        classification.max_value = Decimal('60')
+        classification.save()
+        self.assertEqual(get_thresholds().max_value, Decimal('60'))
+
+        models.Classification.objects.filter(pk=classification.pk).update(max_value=Decimal('70'))
+        self.assertEqual(get_thresholds().max_value, Decimal('70'))
+
+        classification.delete()
+        self.assertIsNone(get_thresholds())
@@ -0,0 +1,118 @@
+"""
+Tests for the read table partitions.
+"""
+
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from django.contrib.gis.geos import LineString
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+
+from core import models, partitions
+
+VELOCITY_TABLE = models.Velocity_Reads._meta.db_table
+
+
+def partition_of(table, pk):
+    """Return the partition holding the row pk of table."""
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT tableoid::regclass::text FROM {table} WHERE id = %s', [pk])
+        return cursor.fetchone()[0]
+
+
+class PartitionBoundTests(SimpleTestCase):
+    """Test the interval arithmetic."""
+
+    def test_month_bounds(self):
+        moment = datetime(2026, 12, 17, 15, 30, tzinfo=timezone.utc)
+
+        start = partitions.floor_bound(moment, 'month')
+
+        self.assertEqual(start, datetime(2026, 12, 1, tzinfo=timezone.utc))
+        self.assertEqual(
+            partitions.next_bound(start, 'month'), datetime(2027, 1, 1, tzinfo=timezone.utc)
+        )
+        self.assertEqual(
+            partitions.shift_bound(start, 'month', -12), datetime(2025, 12, 1, tzinfo=timezone.utc)
+        )
+
+    def test_week_bounds(self):
+        moment = datetime(2026, 10, 18, 8, tzinfo=timezone.utc)  # a Sunday
+
+        start = partitions.floor_bound(moment, 'week')
+
+        self.assertEqual(start, datetime(2026, 10, 12, tzinfo=timezone.utc))
+        self.assertEqual(
+            partitions.next_bound(start, 'week'), datetime(2026, 10, 19, tzinfo=timezone.utc)
+        )
+
+
+class PartitionCommandTests(TestCase):
+    """Test the manage_partitions command against the partitioned tables."""
+
+    def setUp(self):
+        self.road = models.Road.objects.create(
+            segment=LineString((103.9460064, 30.75066046), (103.9564943, 30.7450801)),
+            length=1179.2,
+        )
+
+    def test_creates_partitions_ahead(self):
+        """Test the current and upcoming partitions are created."""
+        call_command('manage_partitions', '--ahead', '2')
+
+        for model in partitions.PARTITIONED_MODELS:
+            table = model._meta.db_table
+            self.assertEqual(len(partitions.list_partitions(table)), 3)
+
+        read = models.Velocity_Reads.objects.create(road=self.road, read_value=Decimal('20'))
+        self.assertNotEqual(partition_of(VELOCITY_TABLE, read.id), f'{VELOCITY_TABLE}_default')
+        self.assertTrue(models.Velocity_Reads.objects.filter(id=read.id).exists())
+
+    def test_since_moves_rows_out_of_default(self):
+        """Test creating a past partition moves its rows out of the default one."""
+        read = models.Velocity_Reads.objects.create(road=self.road, read_value=Decimal('20'))
+        models.Velocity_Reads.objects.filter(id=read.id).update(
+            read_at=datetime(2025, 3, 10, tzinfo=timezone.utc)
+        )
+        self.assertEqual(partition_of(VELOCITY_TABLE, read.id), f'{VELOCITY_TABLE}_default')
+
+        partitions.ensure_partitions(
+            VELOCITY_TABLE, 'month', 0, since=datetime(2025, 3, 1, tzinfo=timezone.utc)
+        )
+
+        self.assertEqual(partition_of(VELOCITY_TABLE, read.id), f'{VELOCITY_TABLE}_p20250301')
+
+    def test_expire_refreshes_road_state(self):
+        """Test reads of expired partitions no longer count in the road state."""
+        old = models.Velocity_Reads.objects.create(
+            road=self.road, read_value=Decimal('20'), read_at=datetime(2025, 3, 10, tzinfo=timezone.utc)
+        )
+        recent = models.Velocity_Reads.objects.create(road=self.road, read_value=Decimal('30'))
+        call_command('manage_partitions', '--since', '2025-03-01')
+        self.road.refresh_from_db()
+        self.assertEqual(self.road.total_reads, 2)
+
+        call_command('manage_partitions', '--retention', '1')
+
+        self.assertNotEqual(partition_of(VELOCITY_TABLE, recent.id), f'{VELOCITY_TABLE}_default')
+        self.assertFalse(models.Velocity_Reads.objects.filter(id=old.id).exists())
+        self.road.refresh_from_db()
+        self.assertEqual(self.road.total_reads, 1)
+        self.assertEqual(self.road.last_read_value, Decimal('30'))
+
+    def test_expire_partitions(self):
+        """Test partitions past the retention are detached without row deletes."""
+        now = datetime(2026, 10, 18, tzinfo=timezone.utc)
+        partitions.ensure_partitions(
+            VELOCITY_TABLE, 'month', 0, since=datetime(2026, 7, 1, tzinfo=timezone.utc), now=now
+        )
+
+        expired = partitions.expire_partitions(VELOCITY_TABLE, 'month', 2, now=now)
+
+        self.assertEqual(expired, [f'{VELOCITY_TABLE}_p20260701'])
+        self.assertEqual(
+            sorted(partitions.list_partitions(VELOCITY_TABLE)),
+            [f'{VELOCITY_TABLE}_p20260801', f'{VELOCITY_TABLE}_p20260901', f'{VELOCITY_TABLE}_p20261001'],
+        )
@@ -0,0 +1,73 @@
+"""
+Tests for the cached API key permission.
+"""
+
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+from rest_framework_api_key.models import APIKey
+
+from core.permissions import CachedHasAPIKey
+
+
+class CachedHasAPIKeyTests(TestCase):
+    """Test API key verifications are cached and invalidated."""
+
+    def setUp(self):
+        cache.clear()
+        self.api_key, self.key = APIKey.objects.create_key(name='sensor fleet')
+        self.permission = CachedHasAPIKey()
+
+    def request(self, key):
+        return APIRequestFactory().post('/', **{settings.API_KEY_CUSTOM_HEADER: key})
+
+    def test_cached_verification(self):
+        """Test a key is only hashed and looked up on its first request."""
+        self.assertTrue(self.permission.has_permission(self.request(self.key), None))
+
+        with patch.object(APIKey.objects.key_generator, 'verify') as patched_verify:
+            with self.assertNumQueries(0):
+                allowed = self.permission.has_permission(self.request(self.key), None)
+
+        self.assertTrue(allowed)
+        patched_verify.assert_not_called()
+
+    def test_invalid_key(self):
+        """Test missing and wrong keys are refused and not cached."""
+        wrong = self.key[:-1] + ('a' if self.key[-1] != 'a' else 'b')
+
+        self.assertFalse(self.permission.has_permission(self.request(''), None))
+        self.assertFalse(self.permission.has_permission(self.request(wrong), None))
+        self.assertFalse(self.permission.has_permission(self.request(wrong), None))
+
+    def test_revoked_key(self):
+        """Test revoking a key takes effect immediately."""
+        self.assertTrue(self.permission.has_permission(self.request(self.key), None))
+
+        self.api_key.revoked = True
+        self.api_key.save()
+
+        self.assertFalse(self.permission.has_permission(self.request(self.key), None))
+
+    def test_expiring_key(self):
+        """Test a verification is never cached past the key expiry."""
+        self.api_key.expiry_date = timezone.now() + timedelta(seconds=5)
+        self.api_key.save()
+
+        with patch('core.permissions.cache.set') as patched_set:
+            self.assertTrue(self.permission.has_permission(self.request(self.key), None))
+
+        timeouts = [call.args[2] for call in patched_set.call_args_list]
+        self.assertLessEqual(timeouts[-1], 5)
+
+    def test_expired_key(self):
+        """Test an expired key is refused."""
+        self.api_key.expiry_date = timezone.now() - timedelta(seconds=1)
+        self.api_key.save()
+
+        self.assertFalse(self.permission.has_permission(self.request(self.key), None))
@@ -0,0 +1,97 @@
+"""
+Query plan regression tests for the read tables.
+"""
+
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.gis.geos import LineString
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from core import models
+from core.pagination import KeysetPagination
+
+READ_TABLES = ('core_velocity_reads', 'core_plates_reads')
+
+
+class ReadQueryPlanTests(TestCase):
+    """
+    Test the queries issued by the read endpoints are index-assisted.
+    Sequential scans are disabled, so the planner only picks one when no
+    index can serve the query.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.road = models.Road.objects.create(
+            name='Plan road',
+            segment=LineString((103.9460064, 30.75066046), (103.9564943, 30.7450801)),
+            length=1179.2,
+        )
+        cls.car = models.Car.objects.create(license_plate='AA16AA')
+        sensor = models.Sensor.objects.create(name='Plan sensor', uuid=uuid.uuid4())
+        now = timezone.now()
+        for i in range(50):
+            models.Velocity_Reads.objects.create(road=cls.road, read_value=Decimal('30'))
+            models.Plates_Reads.objects.create(
+                road_segment=cls.road,
+                car_plate=cls.car,
+                sensor=sensor,
+                read_at=now - timedelta(minutes=i),
+            )
+
+    def setUp(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def assertNoSeqScan(self, queryset):
+        """Fail if the plan of queryset scans a read table sequentially."""
+        plan = queryset.explain()
+        for table in READ_TABLES:
+            self.assertNotIn(f'Seq Scan on {table}', plan, msg=plan)
+
+    def test_latest_read_per_road(self):
+        """Test the road list subqueries use the (road, read_at) index."""
+        self.assertNoSeqScan(
+            models.Road.objects.with_read_state(from_reads=True).order_by('-id')[:100]
+        )
+
+    def test_velocity_reads_list(self):
+        """Test listing velocity reads by time."""
+        self.assertNoSeqScan(models.Velocity_Reads.objects.order_by('-read_at')[:100])
+        self.assertNoSeqScan(
+            models.Velocity_Reads.objects.order_by('-read_at', '-id')[:101]
+        )
+
+    def test_plates_reads_list(self):
+        """Test listing plate reads by time."""
+        self.assertNoSeqScan(models.Plates_Reads.objects.order_by('-read_at')[:100])
+        self.assertNoSeqScan(models.Plates_Reads.objects.order_by('-read_at', '-id')[:101])
+
+    def test_plates_reads_time_window(self):
+        """Test reads in a time window."""
+        since = timezone.now() - timedelta(hours=1)
+        self.assertNoSeqScan(models.Plates_Reads.objects.filter(read_at__gte=since))
+
+    def test_pass_by_window(self):
+        """Test the 24h pass-by lookup of a car."""
+        since = timezone.now() - timedelta(hours=24)
+        self.assertNoSeqScan(
+            models.Plates_Reads.objects.filter(car_plate=self.car, read_at__gte=since)
+            .select_related('sensor', 'road_segment')
+        )
+
+    def test_keyset_cursor(self):
+        """Test a cursor page is an index range scan starting at the cursor."""
+        for model in (models.Velocity_Reads, models.Plates_Reads):
+            read = model.objects.order_by('-read_at', '-id')[10]
+            for reverse in (False, True):
+                queryset = KeysetPagination.apply_cursor(
+                    model.objects.all(), reverse, (read.read_at, read.pk)
+                )[:101]
+                plan = queryset.explain()
+                self.assertRegex(plan, r'Index Cond: .*read_at', msg=plan)
+                self.assertNotIn('Seq Scan', plan, msg=plan)
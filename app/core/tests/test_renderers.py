@@ -0,0 +1,92 @@
+"""
+Tests for the orjson renderer and parser.
+"""
+
+import io
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from django.contrib.gis.geos import LineString
+from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from core.parsers import ORJSONParser
+from core.renderers import ORJSONRenderer
+
+
+class ORJSONRendererTests(SimpleTestCase):
+    """Test the orjson renderer."""
+
+    def test_render_matches_drf(self):
+        """Test values render to the same JSON as DRF's JSONRenderer."""
+        data = {
+            'read_value': Decimal('20.05'),
+            'uuid': uuid.UUID('270e4cc0-d454-4b42-8682-80e87c3d163c'),
+            'read_at': datetime(2026, 10, 18, 12, 30, tzinfo=timezone.utc),
+            'duration': timedelta(minutes=1),
+            'detail': gettext_lazy('Not found.'),
+            'items': (1, 2),
+        }
+
+        rendered = ORJSONRenderer().render(data)
+
+        self.assertEqual(
+            JSONParser().parse(io.BytesIO(rendered)),
+            JSONParser().parse(io.BytesIO(JSONRenderer().render(data))),
+        )
+
+    def test_render_geometry(self):
+        """Test GEOS geometries render as GeoJSON."""
+        segment = LineString((103.9460064, 30.75066046), (103.9564943, 30.7450801))
+
+        rendered = ORJSONRenderer().render({'segment': segment})
+
+        geometry = JSONParser().parse(io.BytesIO(rendered))['segment']
+        self.assertEqual(geometry['type'], 'LineString')
+        self.assertEqual(geometry['coordinates'][0], [103.9460064, 30.75066046])
+
+    def test_render_indent(self):
+        """Test the browsable API indent request is honoured."""
+        rendered = ORJSONRenderer().render({'a': 1}, 'application/json; indent=4')
+
+        self.assertIn(b'\n', rendered)
+
+    def test_render_non_finite(self):
+        """Test NaN and Infinity render as null, where JSONRenderer raises."""
+        rendered = ORJSONRenderer().render({'a': float('nan'), 'b': float('inf')})
+
+        self.assertEqual(JSONParser().parse(io.BytesIO(rendered)), {'a': None, 'b': None})
+        with self.assertRaises(ValueError):
+            JSONRenderer().render({'a': float('nan')})
+
+    def test_render_none(self):
+        """Test empty responses render no body."""
+        self.assertEqual(ORJSONRenderer().render(None), b'')
+
+
+class ORJSONParserTests(SimpleTestCase):
+    """Test the orjson parser."""
+
+    def test_parse(self):
+        """Test a JSON body is parsed."""
+        data = ORJSONParser().parse(io.BytesIO(b'[{"road": 1, "read_value": 20.5}]'))
+
+        self.assertEqual(data, [{'road': 1, 'read_value': 20.5}])
+
+    def test_parse_invalid(self):
+        """Test malformed JSON raises a parse error."""
+        with self.assertRaises(ParseError):
+            ORJSONParser().parse(io.BytesIO(b'{"road": '))
+
+    def test_parse_large_integers(self):
+        """Test integers past the 64-bit range are rejected instead of turned into floats."""
+        for body in (b'{"road_segment": 100000000000000000000}', b'[-9223372036854775809]'):
+            with self.assertRaises(ParseError):
+                ORJSONParser().parse(io.BytesIO(body))
+
+        data = ORJSONParser().parse(io.BytesIO(b'[18446744073709551615, "12345678901234567890", 1e30]'))
+        self.assertEqual(data, [18446744073709551615, '12345678901234567890', 1e30])
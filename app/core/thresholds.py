@@ -0,0 +1,53 @@
+"""
+Cached access to the intensity classification thresholds.
+"""
+
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from core.models import Classification
+
+CACHE_KEY = 'core:classification:thresholds'
+
+Thresholds = namedtuple('Thresholds', ['min_value', 'max_value'])
+
+
+def get_thresholds():
+    """
+    Return the current Thresholds, or None if no classification exists.
+    Served from the cache, the database is only hit after an invalidation.
+    """
+    cached = cache.get(CACHE_KEY)
+    if cached is not None:
+        return Thresholds(*cached) if cached else None
+
+    classification = Classification.objects.order_by('id').first()
+    if classification is None:
+        value = ()
+    else:
+        value = (classification.min_value, classification.max_value)
+    cache.set(CACHE_KEY, value, settings.CLASSIFICATION_CACHE_TIMEOUT)
+    return Thresholds(*value) if value else None
+
+
+def invalidate_thresholds():
+    """
+    Drop the cached thresholds now and again once the transaction commits,
+    so concurrent readers can not cache the value being replaced.
+    """
+    cache.delete(CACHE_KEY)
+    transaction.on_commit(lambda: cache.delete(CACHE_KEY))
+
+
+def intensity_class(value, thresholds):
+    """Return the intensity class of a read value, as Road.with_read_state does in SQL."""
+    if value is None or thresholds is None:
+        return None
+    if value < thresholds.min_value:
+        return 'baixa'
+    if value < thresholds.max_value:
+        return 'media'
+    return 'alta'
@@ -0,0 +1,202 @@
+"""
+Mapbox Vector Tiles of the road network, cached until roads or their intensity change.
+"""
+
+import math
+import uuid
+
+from django.conf import settings
+from django.contrib.gis.db.models.functions import Transform
+from django.contrib.gis.geos import Polygon
+from django.core.cache import cache
+from django.db import connection, models, transaction
+from django.db.models import FloatField, Func, Value
+
+GENERATION_KEY = 'core:tiles:generation'
+REGION_KEY = 'core:tiles:region:{z}:{x}:{y}'
+
+# Tiles deeper than REGION_ZOOM share the generation of their ancestor at that zoom.
+REGION_ZOOM = 12
+# Past this many regions an invalidation moves every tile to a new generation.
+MAX_SCOPED_REGIONS = 1000
+
+MAX_ZOOM = 22
+TILE_EXTENT = 4096
+TILE_BUFFER = 64
+LAYER_NAME = 'roads'
+
+EARTH_RADIUS = 6378137.0
+MERCATOR_HALF_SIZE = math.pi * EARTH_RADIUS
+
+
+class AsMVTGeom(Func):
+    """
+    ST_AsMVTGeom of a geometry into tile coordinates. Only used inside the
+    ST_AsMVT query, so the geometry is never fetched or converted in Python.
+    """
+    function = 'ST_AsMVTGeom'
+    output_field = models.BinaryField()
+
+
+def is_valid_tile(z, x, y):
+    """Return whether z/x/y address an existing tile."""
+    return 0 <= z <= MAX_ZOOM and 0 <= x < 2 ** z and 0 <= y < 2 ** z
+
+
+def tile_bounds(z, x, y):
+    """Return the (xmin, ymin, xmax, ymax) web mercator bounds of a tile."""
+    size = 2 * MERCATOR_HALF_SIZE / 2 ** z
+    xmin = -MERCATOR_HALF_SIZE + x * size
+    ymax = MERCATOR_HALF_SIZE - y * size
+    return xmin, ymax - size, xmin + size, ymax
+
+
+def to_lon_lat(mx, my):
+    """Convert web mercator metres to WGS84 degrees."""
+    lon = math.degrees(mx / EARTH_RADIUS)
+    lat = math.degrees(2 * math.atan(math.exp(my / EARTH_RADIUS)) - math.pi / 2)
+    return lon, lat
+
+
+def tile_search_area(bounds):
+    """
+    WGS84 box of a tile plus its buffer, matched against the segment GiST index.
+    """
+    xmin, ymin, xmax, ymax = bounds
+    margin = (xmax - xmin) * TILE_BUFFER / TILE_EXTENT
+    area = Polygon.from_bbox(
+        to_lon_lat(xmin - margin, ymin - margin) + to_lon_lat(xmax + margin, ymax + margin)
+    )
+    area.srid = 4326
+    return area
+
+
+def render_road_tile(z, x, y):
+    """
+    Build the tile in PostGIS: road id, name and intensity class of every
+    segment crossing the tile, encoded with ST_AsMVT.
+    """
+    from core.models import Road
+
+    bounds = tile_bounds(z, x, y)
+    envelope = Func(
+        *(Value(b) for b in bounds), Value(3857),
+        function='ST_MakeEnvelope',
+        output_field=models.BinaryField(),
+    )
+    rows = Road.objects.with_read_state(
+        from_reads=settings.ROAD_READ_STATE_FROM_READS
+    ).filter(
+        segment__bboverlaps=tile_search_area(bounds)
+    ).annotate(
+        mvt_geom=AsMVTGeom(
+            Transform('segment', 3857), envelope,
+            Value(TILE_EXTENT), Value(TILE_BUFFER), Value(True),
+        )
+    ).order_by().values('id', 'name', 'intensity_class', 'mvt_geom')
+
+    sql, params = rows.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT ST_AsMVT(tile, %s, {TILE_EXTENT}, 'mvt_geom')
+            FROM ({sql}) AS tile
+            WHERE tile.mvt_geom IS NOT NULL
+            """,
+            [LAYER_NAME, *params],
+        )
+        tile = cursor.fetchone()[0]
+    return bytes(tile) if tile else b''
+
+
+def region_key(z, x, y):
+    """Return the cache key of the generation of the region holding tile z/x/y."""
+    shift = max(z - REGION_ZOOM, 0)
+    return REGION_KEY.format(z=z - shift, x=x >> shift, y=y >> shift)
+
+
+def tile_range(z, lon_min, lat_min, lon_max, lat_max):
+    """
+    Yield the x, y of the tiles of zoom z whose buffered area overlaps a
+    WGS84 box, as matched by tile_search_area.
+    """
+    n = 2 ** z
+    margin = TILE_BUFFER / TILE_EXTENT
+
+    def to_tile(lon, lat):
+        lat = max(min(lat, 85.0511), -85.0511)
+        fx = (lon + 180) / 360 * n
+        fy = (1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * n
+        return fx, fy
+
+    x_min, y_min = to_tile(lon_min, lat_max)
+    x_max, y_max = to_tile(lon_max, lat_min)
+    for x in range(max(int(x_min - margin), 0), min(int(x_max + margin), n - 1) + 1):
+        for y in range(max(int(y_min - margin), 0), min(int(y_max + margin), n - 1) + 1):
+            yield x, y
+
+
+def _current(keys):
+    """Return the generation tokens of keys, creating the missing ones."""
+    tokens = cache.get_many(keys)
+    for key in keys:
+        if key not in tokens:
+            cache.add(key, uuid.uuid4().hex, None)
+            tokens[key] = cache.get(key)
+    return [tokens[key] for key in keys]
+
+
+def _bump(keys):
+    """
+    Move keys to new generations, now and again once the transaction commits,
+    so tiles rendered from the data being replaced are never served.
+    """
+    keys = list(keys)
+    cache.set_many({key: uuid.uuid4().hex for key in keys}, None)
+    transaction.on_commit(lambda: cache.set_many({key: uuid.uuid4().hex for key in keys}, None))
+
+
+def tile_generation(z, x, y):
+    """Return the token identifying the current version of tile z/x/y."""
+    return ':'.join(_current([GENERATION_KEY, region_key(z, x, y)]))
+
+
+def get_road_tile(z, x, y):
+    """Return the road tile z/x/y, from the cache when it is still current."""
+    key = f'core:tiles:{tile_generation(z, x, y)}:{z}:{x}:{y}'
+    tile = cache.get(key)
+    if tile is None:
+        tile = render_road_tile(z, x, y)
+        cache.set(key, tile, settings.ROAD_TILE_CACHE_TIMEOUT)
+    return tile
+
+
+def invalidate_tiles():
+    """Move every tile to a new generation (road or classification changes)."""
+    _bump([GENERATION_KEY])
+
+
+def invalidate_road_tiles(road_ids):
+    """
+    Move the tiles of the given roads to a new generation, at every zoom,
+    leaving the tiles of the rest of the network cached.
+    """
+    if not road_ids:
+        return
+    from core.models import Road
+
+    extents = Road.objects.filter(pk__in=road_ids).annotate(
+        **{
+            bound: Func('segment', function=f'ST_{bound.upper()}', output_field=FloatField())
+            for bound in ('xmin', 'ymin', 'xmax', 'ymax')
+        }
+    ).values_list('xmin', 'ymin', 'xmax', 'ymax')
+
+    keys = set()
+    for extent in extents:
+        for z in range(REGION_ZOOM + 1):
+            keys.update(region_key(z, x, y) for x, y in tile_range(z, *extent))
+        if len(keys) > MAX_SCOPED_REGIONS:
+            invalidate_tiles()
+            return
+    _bump(keys)
@@ -0,0 +1,50 @@
+"""
+Benchmarks for the road APIs, run with `manage.py benchmark`.
+"""
+
+import math
+
+from django.contrib.gis.geos import LineString
+from rest_framework.renderers import JSONRenderer
+
+from core.models import SEGMENT_SIMPLIFICATIONS, Road
+from road.serializers import RoadSerializer
+
+
+def make_roads(size, vertices=250):
+    """Create size curvy roads of the given number of vertices."""
+    roads = []
+    for i in range(size):
+        origin = (-9.2 + (i % 100) * 0.01, 38.7 + (i // 100) * 0.01)
+        road = Road(
+            name=f'Benchmark road {i}',
+            segment=LineString([
+                (
+                    origin[0] + j * 0.00004,
+                    origin[1] + 0.0003 * math.sin(j / 8) + 0.00001 * math.sin(j),
+                )
+                for j in range(vertices)
+            ]),
+            length=1000.0,
+        )
+        road.simplify_segment()
+        roads.append(road)
+    return Road.objects.bulk_create(roads, batch_size=1000)
+
+
+def road_payload(size, timer, report):
+    """Compare the size and rendering time of the road list payload per segment variant."""
+    make_roads(size)
+    queryset = Road.objects.with_read_state().order_by('-id')[:size]
+
+    cases = [('full', None, None), ('full, precision 6', None, 6)]
+    cases += [(variant, variant, 6) for variant in SEGMENT_SIMPLIFICATIONS]
+    for label, variant, precision in cases:
+        context = {'segment_variant': variant, 'segment_precision': precision}
+
+        def render():
+            data = RoadSerializer(queryset, many=True, context=context).data
+            return JSONRenderer().render(data)
+
+        payload = timer(f'render {label}', size, render)
+        report(f'bytes {label}', f'{len(payload):>12}')
@@ -1,32 +1,152 @@
-"""Filter for roads by intensity"""
+"""Filter for roads by intensity and location"""
 
+from django.contrib.gis.db.models import GeometryField
+from django.contrib.gis.geos import Point, Polygon
+from django.db import models
+from django.db.models import F, Func, Subquery, Value
 from django_filters import rest_framework as filters
-from core.models import Road, Classification
+from rest_framework.exceptions import ValidationError
+
+from core.models import Road
+from core.thresholds import get_thresholds
+
+INTENSITY_CHOICES = (
+    ('baixa', 'baixa'),
+    ('media', 'media'),
+    ('alta', 'alta'),
+)
+
+MAX_NEAREST = 100
+
+
+class GeographyCast(Func):
+    """
+    Cast to geography, written as road_segment_geog_idx is defined so the
+    planner can match the index expression.
+    """
+    template = '(%(expressions)s)::geography'
+    output_field = GeometryField(geography=True)
+
+
+class DWithin(Func):
+    """ST_DWithin, usable as a filter condition."""
+    function = 'ST_DWithin'
+    output_field = models.BooleanField()
+
+
+class KNNDistance(Func):
+    """The <-> bounding box distance operator, ordered by through the GiST index."""
+    template = '%(expressions)s'
+    arg_joiner = ' <-> '
+    output_field = models.FloatField()
+
+
+def parse_numbers(value, count, param):
+    """Parse a comma separated list of count numbers."""
+    try:
+        numbers = [float(n) for n in value.split(',')]
+    except ValueError:
+        numbers = []
+    if len(numbers) != count:
+        raise ValidationError({param: f"Expected {count} comma separated numbers."})
+    return numbers
+
 
 class RoadFilter(filters.FilterSet):
-    intensity = filters.CharFilter(method='filter_by_intensity')
+    """
+    Filter roads on the intensity class of their latest read and on their segment.
+    Expects a queryset annotated by RoadQuerySet.with_read_state.
+    """
+    intensity = filters.ChoiceFilter(choices=INTENSITY_CHOICES, method='filter_by_intensity')
+    intensity__lt = filters.ChoiceFilter(choices=INTENSITY_CHOICES, method='filter_by_intensity')
+    intensity__gt = filters.ChoiceFilter(choices=INTENSITY_CHOICES, method='filter_by_intensity')
+    in_bbox = filters.CharFilter(
+        method='filter_in_bbox',
+        help_text='min_lon,min_lat,max_lon,max_lat: roads whose bounding box overlaps it',
+    )
+    point = filters.CharFilter(
+        method='filter_point',
+        help_text='lon,lat: origin of dist and nearest',
+    )
+    dist = filters.NumberFilter(
+        method='filter_dist',
+        min_value=0,
+        help_text='Roads within this many metres of point',
+    )
+    nearest = filters.NumberFilter(
+        method='filter_nearest',
+        min_value=1,
+        max_value=MAX_NEAREST,
+        help_text='The N roads closest to point, nearest first',
+    )
 
     class Meta:
         model = Road
-        fields = {'intensity': ['lt', 'gt'],}
+        fields = ['intensity', 'intensity__lt', 'intensity__gt', 'in_bbox', 'point', 'dist', 'nearest']
+
+    def get_bounds(self, value):
+        """Return the [lower, upper) speed range of an intensity class."""
+        thresholds = get_thresholds()
+        if thresholds is None:
+            return None
+        return {
+            'baixa': (None, thresholds.min_value),
+            'media': (thresholds.min_value, thresholds.max_value),
+            'alta': (thresholds.max_value, None),
+        }[value]
 
     def filter_by_intensity(self, queryset, name, value):
-        thresholds = Classification.objects.first()
-        if not thresholds:
+        """Translate the intensity class into a range predicate on the latest read."""
+        bounds = self.get_bounds(value)
+        if bounds is None:
             return queryset.none()
 
-        filtered = []
-        for road in queryset:
-            last_read = road.velocity_reads.order_by('-read_at').first()
-            if not last_read:
-                continue
-
-            speed = last_read.read_value
-            if value == 'baixa' and speed < thresholds.min_value:
-                filtered.append(road.id)
-            elif value == 'media' and thresholds.min_value <= speed < thresholds.max_value:
-                filtered.append(road.id)
-            elif value == 'alta' and speed >= thresholds.max_value:
-                filtered.append(road.id)
-
-        return queryset.filter(id__in=filtered)
+        lower, upper = bounds
+        if name == 'intensity__lt':
+            if lower is None:  # nothing is below 'baixa'
+                return queryset.none()
+            lower, upper = None, lower
+        elif name == 'intensity__gt':
+            if upper is None:  # nothing is above 'alta'
+                return queryset.none()
+            lower, upper = upper, None
+
+        queryset = queryset.filter(latest_read_value__isnull=False)
+        if lower is not None:
+            queryset = queryset.filter(latest_read_value__gte=lower)
+        if upper is not None:
+            queryset = queryset.filter(latest_read_value__lt=upper)
+        return queryset
+
+    def get_point(self):
+        """Return the point parameter dist and nearest are measured from."""
+        value = self.form.cleaned_data.get('point')
+        if not value:
+            raise ValidationError({'point': "Required by dist and nearest."})
+        return Point(*parse_numbers(value, 2, 'point'), srid=4326)
+
+    def filter_in_bbox(self, queryset, name, value):
+        """Keep roads overlapping the box, through the && operator on the segment index."""
+        bbox = Polygon.from_bbox(parse_numbers(value, 4, name))
+        bbox.srid = 4326
+        return queryset.filter(segment__bboverlaps=bbox)
+
+    def filter_point(self, queryset, name, value):
+        """The point only filters together with dist or nearest."""
+        if self.form.cleaned_data.get('dist') is None and not self.form.cleaned_data.get('nearest'):
+            raise ValidationError({'point': "Use with dist or nearest."})
+        return queryset
+
+    def filter_dist(self, queryset, name, value):
+        """Keep roads within value metres, through ST_DWithin on road_segment_geog_idx."""
+        point = Value(self.get_point(), output_field=GeometryField(geography=True))
+        return queryset.filter(DWithin(GeographyCast('segment'), point, Value(float(value))))
+
+    def filter_nearest(self, queryset, name, value):
+        """
+        Keep the value roads closest to the point, found with a KNN scan of the
+        segment index, and order them by distance.
+        """
+        distance = KNNDistance(F('segment'), Value(self.get_point(), output_field=GeometryField()))
+        closest = queryset.order_by(distance).values('pk')[:int(value)]
+        return queryset.filter(pk__in=Subquery(closest)).order_by(distance)
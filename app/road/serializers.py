@@ -2,6 +2,9 @@
 Serializers for Road APIs
 """
 
+import math
+
+from django.utils.dateparse import parse_datetime
 from rest_framework import serializers
 from drf_spectacular.utils import extend_schema_field
 from rest_framework_gis import serializers as gis_serializers
@@ -9,10 +12,14 @@ from rest_framework_gis.fields import GeometryField, GeometrySerializerMethodFie
 
 
 from core.models import (
+    ROLLUP_BUCKETS,
+    SEGMENT_SIMPLIFICATIONS,
     Road,
+    RoadSpeedRollup,
     Velocity_Reads,
     Classification,
 )
+from core.thresholds import get_thresholds
 
 
 
@@ -30,8 +37,61 @@ class ClassificationSerializer(serializers.ModelSerializer):
         model = Classification
         fields = ['min_value','max_value']
 
+def segment_variant_for_zoom(zoom):
+    """
+    Return the coarsest segment variant whose tolerance stays under the size
+    of a 256px tile pixel at zoom, or None for the full geometry.
+    """
+    pixel = 360 / (256 * 2 ** zoom)
+    fitting = [v for v, tolerance in SEGMENT_SIMPLIFICATIONS.items() if tolerance <= pixel]
+    return max(fitting, key=SEGMENT_SIMPLIFICATIONS.get) if fitting else None
+
+
+class RoadGeometryQuerySerializer(serializers.Serializer):
+    """Serializer for the geometry query parameters of the road endpoints."""
+    simplify = serializers.ChoiceField(choices=['none', *SEGMENT_SIMPLIFICATIONS], required=False)
+    zoom = serializers.IntegerField(min_value=0, max_value=22, required=False)
+    precision = serializers.IntegerField(min_value=0, max_value=15, required=False)
+
+    def validate(self, attrs):
+        if 'simplify' in attrs and 'zoom' in attrs:
+            raise serializers.ValidationError('Use either "simplify" or "zoom".')
+        return attrs
+
+    def get_options(self):
+        """Return the serializer context entries SegmentField reads."""
+        if 'zoom' in self.validated_data:
+            variant = segment_variant_for_zoom(self.validated_data['zoom'])
+        else:
+            variant = self.validated_data.get('simplify')
+        return {
+            'segment_variant': None if variant == 'none' else variant,
+            'segment_precision': self.validated_data.get('precision'),
+        }
+
+
+class SegmentField(GeometryField):
+    """
+    Road segment, rendered from the simplified variant and with the coordinate
+    precision found in the serializer context.
+    """
+
+    def get_attribute(self, instance):
+        variant = self.context.get('segment_variant')
+        if variant:
+            simplified = getattr(instance, f'segment_{variant}')
+            if simplified is not None:
+                return simplified
+        return super().get_attribute(instance)
+
+    def to_representation(self, value):
+        self.precision = self.context.get('segment_precision')
+        return super().to_representation(value)
+
+
 class RoadSerializer(gis_serializers.GeoFeatureModelSerializer):
     """ Serializer for road. """
+    segment = SegmentField()
     total_reads= serializers.SerializerMethodField()
     intensity= serializers.SerializerMethodField()
 
@@ -43,16 +103,18 @@ class RoadSerializer(gis_serializers.GeoFeatureModelSerializer):
 
     @extend_schema_field(serializers.IntegerField())
     def get_total_reads(self, obj):
-        return obj.velocity_reads.count()
-    
+        return getattr(obj, 'reads_count', obj.total_reads)
+
     @extend_schema_field(serializers.CharField())
     def get_intensity(self,obj):
-        thresholds = Classification.objects.first()
-        last_read = obj.velocity_reads.order_by('-read_at').first()
-        if last_read:
-            return get_intensity(last_read.read_value, thresholds.min_value, thresholds.max_value)
-        return None
-        
+        if hasattr(obj, 'intensity_class'):  # annotated by RoadQuerySet.with_read_state
+            return obj.intensity_class
+        if obj.last_read_value is None:
+            return None
+        thresholds = get_thresholds()
+        if thresholds is None:
+            return None
+        return get_intensity(obj.last_read_value, thresholds.min_value, thresholds.max_value)
     
     
 
@@ -66,3 +128,94 @@ class ReadSerializer(serializers.ModelSerializer):
         fields = ['id','road','read_value','read_at']
         read_only_fields = ['id','read_at']  
 
+
+class ReadBatchItemSerializer(serializers.Serializer):
+    """
+    Serializer for one item of a bulk read upload. The road is checked for the
+    whole batch at once by validate_read_batch.
+    """
+    road = serializers.IntegerField(min_value=1, max_value=2 ** 63 - 1)
+    read_value = serializers.DecimalField(max_digits=5, decimal_places=2)
+
+
+def validate_read_batch(items):
+    """
+    Validate a list of read payloads with a single road lookup.
+    Return the unsaved Velocity_Reads of the valid items and the errors of the
+    others as [{'index': i, 'errors': {...}}].
+    """
+    validated, errors = [], []
+    for index, item in enumerate(items):
+        serializer = ReadBatchItemSerializer(data=item)
+        if serializer.is_valid():
+            validated.append((index, serializer.validated_data))
+        else:
+            errors.append({'index': index, 'errors': serializer.errors})
+
+    known_roads = set(
+        Road.objects.filter(
+            id__in={data['road'] for _, data in validated}
+        ).values_list('id', flat=True)
+    )
+    reads = []
+    for index, data in validated:
+        if data['road'] not in known_roads:
+            errors.append({
+                'index': index,
+                'errors': {'road': [f'Invalid pk "{data["road"]}" - object does not exist.']},
+            })
+            continue
+        reads.append(Velocity_Reads(road_id=data['road'], read_value=data['read_value']))
+
+    errors.sort(key=lambda error: error['index'])
+    return reads, errors
+
+
+def ingest_read_batch(items):
+    """
+    Validate and insert queued read payloads, dropping the ones whose road
+    no longer exists, with the read_at they were accepted at.
+    Return a report with the created and rejected counts.
+    """
+    reads, errors = validate_read_batch(items)
+    rejected = {error['index'] for error in errors}
+    accepted = (item for index, item in enumerate(items) if index not in rejected)
+    for read, item in zip(reads, accepted):
+        read_at = parse_datetime(item.get('read_at') or '')
+        if read_at is not None:
+            read.read_at = read_at
+    reads = Velocity_Reads.objects.bulk_ingest(reads)
+    return {'received': len(items), 'created': len(reads), 'rejected_count': len(errors)}
+
+
+class RoadStatsQuerySerializer(serializers.Serializer):
+    """Serializer for the query parameters of the road stats endpoints."""
+    bucket = serializers.ChoiceField(choices=list(ROLLUP_BUCKETS), default='1h')
+    start = serializers.DateTimeField(required=False)
+    end = serializers.DateTimeField(required=False)
+
+    def validate(self, attrs):
+        if 'start' in attrs and 'end' in attrs and attrs['start'] >= attrs['end']:
+            raise serializers.ValidationError('"from" must be before "to".')
+        return attrs
+
+
+class RoadSpeedRollupSerializer(serializers.ModelSerializer):
+    """Serializer for a road speed rollup bucket."""
+    avg_value = serializers.SerializerMethodField()
+    stddev_value = serializers.SerializerMethodField()
+
+    class Meta:
+        model = RoadSpeedRollup
+        fields = ['bucket_start','read_count','min_value','max_value','avg_value','stddev_value']
+        read_only_fields = fields
+
+    @extend_schema_field(serializers.FloatField())
+    def get_avg_value(self, obj):
+        return float(obj.sum_value / obj.read_count)
+
+    @extend_schema_field(serializers.FloatField())
+    def get_stddev_value(self, obj):
+        mean = obj.sum_value / obj.read_count
+        variance = obj.sum_squares / obj.read_count - mean * mean
+        return math.sqrt(max(float(variance), 0.0))
@@ -0,0 +1,54 @@
+"""
+Query plan regression tests for the road spatial filters.
+"""
+
+from django.contrib.gis.geos import LineString
+from django.db import connection
+from django.test import TestCase
+
+from core.models import Road
+from road.filter import RoadFilter
+
+SEGMENT_INDEXES = ('core_road_segment_id', 'road_segment_geog_idx')
+
+
+class RoadSpatialQueryPlanTests(TestCase):
+    """
+    Test the spatial road filters are served by the GiST indexes. Sequential
+    scans are disabled, so the planner only picks one when no index can serve
+    the query.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(50):
+            Road.objects.create(
+                name=f'Plan road {i}',
+                segment=LineString(
+                    (103.94 + i * 0.001, 30.75), (103.95 + i * 0.001, 30.74)
+                ),
+                length=1179.2,
+            )
+
+    def setUp(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def assertUsesIndex(self, params, index):
+        """Fail unless the filtered road queryset is planned through index."""
+        queryset = RoadFilter(params, queryset=Road.objects.all()).qs
+        plan = queryset.explain()
+        self.assertNotIn('Seq Scan on core_road', plan, msg=plan)
+        self.assertIn(index, plan, msg=plan)
+
+    def test_in_bbox(self):
+        """Test the bounding box filter uses the segment index."""
+        self.assertUsesIndex({'in_bbox': '103.9,30.7,104.0,30.8'}, SEGMENT_INDEXES[0])
+
+    def test_dist(self):
+        """Test the radius filter uses the geography index."""
+        self.assertUsesIndex({'point': '103.95,30.745', 'dist': '500'}, SEGMENT_INDEXES[1])
+
+    def test_nearest(self):
+        """Test the nearest roads are found with a KNN scan of the segment index."""
+        self.assertUsesIndex({'point': '103.95,30.745', 'nearest': '5'}, SEGMENT_INDEXES[0])
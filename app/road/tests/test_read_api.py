@@ -1,8 +1,15 @@
 """
 Test for reads API"""
 
+import os
+import tempfile
+from io import StringIO
+
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.core.management import call_command
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.contrib.gis.geos import LineString
 from decimal import Decimal
@@ -189,6 +196,116 @@ class PrivateReadApiTests(TestCase):
         self.assertEqual(read.road, road)
         self.assertEqual(read.read_value, payload['read_value'])
 
+    def test_bulk_create_reads(self):
+        """Test creating a batch of reads, reporting the invalid items."""
+        road = create_road()
+        payload = [
+            {'road': road.id, 'read_value': '20.05'},
+            {'road': road.id + 1000, 'read_value': '21.05'},
+            {'road': road.id, 'read_value': 'fast'},
+            {'road': road.id, 'read_value': '35.00'},
+        ]
+        res = self.client.post(READS_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data['created']), 2)
+        self.assertEqual([e['index'] for e in res.data['errors']], [1, 2])
+        self.assertIn('road', res.data['errors'][0]['errors'])
+        self.assertIn('read_value', res.data['errors'][1]['errors'])
+
+        road.refresh_from_db()
+        self.assertEqual(road.total_reads, 2)
+        self.assertEqual(road.last_read_value, Decimal('35.00'))
+        self.assertEqual(Velocity_Reads.objects.filter(road=road).count(), 2)
+
+    def test_bulk_create_reads_all_invalid(self):
+        """Test a batch without any valid read is rejected."""
+        res = self.client.post(READS_URL, [{'road': 999, 'read_value': '20'}], format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Velocity_Reads.objects.exists())
+
+    def test_bulk_create_reads_constant_queries(self):
+        """Test the queries of a batch do not grow with its size."""
+        roads = [create_road(name=f'Road {i}') for i in range(10)]
+
+        def post_queries(size):
+            payload = [
+                {'road': roads[i % len(roads)].id, 'read_value': '30'} for i in range(size)
+            ]
+            with CaptureQueriesContext(connection) as ctx:
+                res = self.client.post(READS_URL, payload, format='json')
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+            return len(ctx.captured_queries)
+
+        self.assertEqual(post_queries(10), post_queries(200))
+
+    def test_create_reads_async(self):
+        """Test Prefer: respond-async queues the valid reads until the queue is drained."""
+        road = create_road()
+        payload = [
+            {'road': road.id, 'read_value': '20.05'},
+            {'road': road.id + 1000, 'read_value': '21.05'},
+        ]
+        with tempfile.TemporaryDirectory() as tmp, \
+                self.settings(INGEST_QUEUE_PATH=os.path.join(tmp, 'queue.sqlite3')):
+            res = self.client.post(READS_URL, payload, format='json', HTTP_PREFER='respond-async')
+
+            self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+            self.assertEqual(res['Preference-Applied'], 'respond-async')
+            self.assertEqual(res.data['queued'], 1)
+            self.assertEqual([e['index'] for e in res.data['errors']], [1])
+            self.assertFalse(Velocity_Reads.objects.exists())
+
+            call_command('drain_ingest_queue', once=True, stdout=StringIO())
+
+        road.refresh_from_db()
+        self.assertEqual(road.total_reads, 1)
+        self.assertEqual(road.last_read_value, Decimal('20.05'))
+
+    def test_create_reads_async_queue_full(self):
+        """Test a full queue answers 503 with Retry-After."""
+        road = create_road()
+        with tempfile.TemporaryDirectory() as tmp, \
+                self.settings(INGEST_QUEUE_PATH=os.path.join(tmp, 'queue.sqlite3'), INGEST_QUEUE_MAX_DEPTH=1):
+            payload = [{'road': road.id, 'read_value': '20'}] * 2
+            res = self.client.post(READS_URL, payload, format='json', HTTP_PREFER='respond-async')
+
+        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertIn('Retry-After', res)
+
+    def test_keyset_pagination(self):
+        """Test walking the reads with cursor links, forwards and backwards."""
+        road = create_road()
+        reads = [create_read(road=road) for _ in range(5)]
+        expected = [r.id for r in sorted(reads, key=lambda r: (r.read_at, r.id), reverse=True)]
+
+        res = self.client.get(READS_URL, {'pagination': 'cursor', 'limit': 2})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn('count', res.data)
+        self.assertIsNone(res.data['previous'])
+
+        seen = [r['id'] for r in res.data['results']]
+        pages = [res]
+        while res.data['next']:
+            res = self.client.get(res.data['next'])
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            seen.extend(r['id'] for r in res.data['results'])
+            pages.append(res)
+        self.assertEqual(seen, expected)
+
+        res = self.client.get(pages[-1].data['previous'])
+        self.assertEqual(
+            [r['id'] for r in res.data['results']],
+            [r['id'] for r in pages[-2].data['results']],
+        )
+
+    def test_keyset_pagination_invalid_cursor(self):
+        """Test an invalid cursor is rejected."""
+        res = self.client.get(READS_URL, {'cursor': 'not-a-cursor'})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
     def test_delete_read(self):
         """Tsst delete  a list of read."""
 
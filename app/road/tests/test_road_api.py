@@ -2,8 +2,12 @@
 Test  for Road APIs.
 """
 
+import json
 from decimal import Decimal
-from django.test import TestCase
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from django.contrib.gis.geos import LineString
@@ -19,7 +23,7 @@ from core.models import (
 
 from road.serializers import (
     RoadSerializer,
-    RoadSerializer
+    segment_variant_for_zoom,
 )
 
 ROADS_URL = reverse('road:road-list')
@@ -46,6 +50,15 @@ def create_road(**params):
 def road_url(road_id):
     return reverse('road:road-detail',args=[road_id])
 
+def stats_url(road_id):
+    return reverse('road:road-stats',args=[road_id])
+
+ROADS_STATS_URL = reverse('road:road-stats-list')
+ROADS_EXPORT_URL = reverse('road:road-export')
+
+def tile_url(z, x, y):
+    return reverse('road:road-tile', args=[z, x, y])
+
     
 
 class PublicRoadApiTests(TestCase):
@@ -89,11 +102,303 @@ class PublicRoadApiTests(TestCase):
         url = road_url(road.id)
 
         res = self.client.get(url)
+        road.refresh_from_db()
         serializer=RoadSerializer(road)
         self.assertEqual(res.data,serializer.data)
 
 
         
+    def test_list_roads_constant_queries(self):
+        """Test listing roads costs the same queries regardless of page size."""
+
+        def list_queries():
+            with CaptureQueriesContext(connection) as ctx:
+                res = self.client.get(ROADS_URL)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            return len(ctx.captured_queries)
+
+        for from_reads in (False, True):
+            with self.subTest(from_reads=from_reads), override_settings(
+                ROAD_READ_STATE_FROM_READS=from_reads
+            ):
+                Road.objects.all().delete()
+                for i in range(2):
+                    road = create_road(name=f'Road {i}')
+                    Velocity_Reads.objects.create(road=road, read_value=Decimal('30'))
+                few = list_queries()
+
+                for i in range(2, 20):
+                    road = create_road(name=f'Road {i}')
+                    Velocity_Reads.objects.create(road=road, read_value=Decimal('30'))
+                many = list_queries()
+
+                self.assertEqual(few, many)
+
+    def test_list_roads_intensity_annotated(self):
+        """Test the annotated intensity matches the thresholds."""
+        for value, expected in (('10', 'baixa'), ('30', 'media'), ('60', 'alta')):
+            road = create_road(name=f'Road {value}')
+            Velocity_Reads.objects.create(road=road, read_value=Decimal(value))
+        create_road(name='Road without reads')
+
+        for from_reads in (False, True):
+            with self.subTest(from_reads=from_reads), override_settings(
+                ROAD_READ_STATE_FROM_READS=from_reads
+            ):
+                res = self.client.get(ROADS_URL)
+
+                features = {
+                    f['properties']['name']: f['properties']
+                    for f in res.data['results']['features']
+                }
+                self.assertEqual(features['Road 10']['intensity'], 'baixa')
+                self.assertEqual(features['Road 30']['intensity'], 'media')
+                self.assertEqual(features['Road 60']['intensity'], 'alta')
+                self.assertIsNone(features['Road without reads']['intensity'])
+                self.assertEqual(features['Road 60']['total_reads'], 1)
+
+    def test_filter_roads_by_intensity(self):
+        """Test filtering roads by intensity class and range."""
+        roads = {}
+        for value in ('10', '30', '60'):
+            roads[value] = create_road(name=f'Road {value}')
+            Velocity_Reads.objects.create(road=roads[value], read_value=Decimal(value))
+        create_road(name='Road without reads')
+
+        cases = (
+            ({'intensity': 'baixa'}, {'10'}),
+            ({'intensity': 'media'}, {'30'}),
+            ({'intensity': 'alta'}, {'60'}),
+            ({'intensity__lt': 'alta'}, {'10', '30'}),
+            ({'intensity__gt': 'baixa'}, {'30', '60'}),
+            ({'intensity__lt': 'baixa'}, set()),
+        )
+        for params, expected in cases:
+            with self.subTest(params=params):
+                res = self.client.get(ROADS_URL, params)
+
+                self.assertEqual(res.status_code, status.HTTP_200_OK)
+                ids = {f['id'] for f in res.data['results']['features']}
+                self.assertEqual(ids, {roads[v].id for v in expected})
+                self.assertEqual(res.data['count'], len(expected))
+
+    def test_filter_roads_invalid_intensity(self):
+        """Test an unknown intensity class is rejected."""
+        res = self.client.get(ROADS_URL, {'intensity': 'extrema'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_filter_roads_by_location(self):
+        """Test the bounding box, radius and nearest road filters."""
+        near = create_road(
+            name='Near', segment=LineString((-9.1400, 38.7100), (-9.1390, 38.7110))
+        )
+        middle = create_road(
+            name='Middle', segment=LineString((-9.1300, 38.7100), (-9.1290, 38.7110))
+        )
+        far = create_road(
+            name='Far', segment=LineString((-8.6100, 41.1500), (-8.6090, 41.1510))
+        )
+        point = '-9.1405,38.7100'
+
+        cases = (
+            ({'in_bbox': '-9.2,38.6,-9.0,38.8'}, [middle, near]),
+            ({'point': point, 'dist': '100'}, [near]),
+            ({'point': point, 'dist': '2000'}, [middle, near]),
+            ({'point': point, 'nearest': '2'}, [near, middle]),
+            ({'point': point, 'nearest': '5'}, [near, middle, far]),
+        )
+        for params, expected in cases:
+            with self.subTest(params=params):
+                res = self.client.get(ROADS_URL, params)
+
+                self.assertEqual(res.status_code, status.HTTP_200_OK)
+                ids = [f['id'] for f in res.data['results']['features']]
+                self.assertEqual(ids, [road.id for road in expected])
+
+    def test_filter_roads_by_location_invalid(self):
+        """Test malformed or incomplete location filters are rejected."""
+        for params in (
+            {'in_bbox': '1,2,3'},
+            {'point': 'a,b', 'dist': '10'},
+            {'dist': '10'},
+            {'point': '1,2'},
+            {'point': '1,2', 'nearest': '0'},
+        ):
+            with self.subTest(params=params):
+                res = self.client.get(ROADS_URL, params)
+
+                self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_list_roads_simplified(self):
+        """Test the simplified segment variants and coordinate precision."""
+        # square waves of ~2 m, ~20 m and ~200 m, below each tolerance in turn
+        wiggly = LineString([
+            (
+                103.9 + i * 0.0001,
+                30.75 + (i % 2) * 0.00002 + (i // 10 % 2) * 0.0002 + (i // 100 % 2) * 0.002,
+            )
+            for i in range(400)
+        ])
+        road = create_road(name='Wiggly road', segment=wiggly)
+        self.assertLess(len(road.segment_coarse), len(road.segment_medium))
+        self.assertLess(len(road.segment_medium), len(road.segment_fine))
+        self.assertLess(len(road.segment_fine), len(wiggly))
+
+        def coordinates(params):
+            res = self.client.get(ROADS_URL, params)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            return res.data['results']['features'][0]['geometry']['coordinates']
+
+        self.assertEqual(len(coordinates({})), 400)
+        self.assertEqual(len(coordinates({'simplify': 'none'})), 400)
+        self.assertEqual(len(coordinates({'simplify': 'coarse'})), len(road.segment_coarse))
+        self.assertEqual(len(coordinates({'zoom': 6})), len(road.segment_coarse))
+        self.assertEqual(len(coordinates({'zoom': 18})), 400)
+        self.assertEqual(coordinates({'precision': 2})[1], (103.9, 30.75))
+
+    def test_segment_variant_for_zoom(self):
+        """Test zoom levels map to coarser variants as they zoom out."""
+        self.assertEqual(segment_variant_for_zoom(5), 'coarse')
+        self.assertEqual(segment_variant_for_zoom(10), 'medium')
+        self.assertEqual(segment_variant_for_zoom(14), 'fine')
+        self.assertIsNone(segment_variant_for_zoom(18))
+
+    def test_list_roads_invalid_geometry_options(self):
+        """Test invalid simplification parameters are rejected."""
+        for params in (
+            {'simplify': 'tiny'},
+            {'zoom': 30},
+            {'precision': -1},
+            {'simplify': 'fine', 'zoom': 10},
+        ):
+            with self.subTest(params=params):
+                res = self.client.get(ROADS_URL, params)
+
+                self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_road_stats(self):
+        """Test the speed statistics of a road are served from the rollups."""
+        road = create_road()
+        Velocity_Reads.objects.create(road=road, read_value=Decimal('10'))
+        Velocity_Reads.objects.create(road=road, read_value=Decimal('30'))
+
+        res = self.client.get(stats_url(road.id), {'bucket': '1h'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 1)
+        stats = res.data[0]
+        self.assertEqual(stats['read_count'], 2)
+        self.assertEqual(Decimal(stats['min_value']), Decimal('10'))
+        self.assertEqual(Decimal(stats['max_value']), Decimal('30'))
+        self.assertAlmostEqual(stats['avg_value'], 20.0)
+        self.assertAlmostEqual(stats['stddev_value'], 10.0)
+
+    def test_road_stats_invalid_bucket(self):
+        """Test an unknown bucket size is rejected."""
+        road = create_road()
+
+        res = self.client.get(stats_url(road.id), {'bucket': '7m'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_multi_road_stats(self):
+        """Test the speed statistics of several roads at once."""
+        first = create_road(name='First')
+        second = create_road(name='Second')
+        Velocity_Reads.objects.create(road=first, read_value=Decimal('10'))
+
+        res = self.client.get(
+            ROADS_STATS_URL, {'roads': f'{first.id},{second.id}', 'bucket': '5m'}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        results = {r['road']: r['stats'] for r in res.data['results']}
+        self.assertEqual(len(results[first.id]), 1)
+        self.assertEqual(results[second.id], [])
+
+    def test_multi_road_stats_requires_roads(self):
+        """Test the multi road statistics require road ids."""
+        res = self.client.get(ROADS_STATS_URL, {'roads': 'a,b'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_roads(self):
+        """Test the road network is streamed as a filtered FeatureCollection."""
+        slow = create_road(name='Slow road')
+        fast = create_road(name='Fast road')
+        Velocity_Reads.objects.create(road=slow, read_value=Decimal('10'))
+        Velocity_Reads.objects.create(road=fast, read_value=Decimal('60'))
+
+        with self.settings(ROAD_EXPORT_CHUNK_SIZE=1):
+            res = self.client.get(ROADS_EXPORT_URL)
+            filtered = self.client.get(ROADS_EXPORT_URL, {'intensity': 'alta'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        self.assertEqual(res['Content-Type'], 'application/geo+json')
+        collection = json.loads(b''.join(res.streaming_content))
+        self.assertEqual(collection['type'], 'FeatureCollection')
+        self.assertEqual([f['id'] for f in collection['features']], [slow.id, fast.id])
+        feature = collection['features'][0]
+        self.assertEqual(feature['geometry']['type'], 'LineString')
+        self.assertEqual(feature['properties']['intensity'], 'baixa')
+        self.assertEqual(feature['properties']['total_reads'], 1)
+        self.assertEqual(RoadSerializer(slow).data['properties'].keys(), feature['properties'].keys())
+
+        filtered_collection = json.loads(b''.join(filtered.streaming_content))
+        self.assertEqual([f['id'] for f in filtered_collection['features']], [fast.id])
+
+    def test_road_tile(self):
+        """Test a vector tile holds the roads crossing it and is cached until they change."""
+        cache.clear()
+        road = create_road(name='Tiled road')
+
+        res = self.client.get(tile_url(1, 1, 0))
+        empty = self.client.get(tile_url(1, 0, 1))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/vnd.mapbox-vector-tile')
+        self.assertIn(b'roads', res.content)
+        self.assertIn(b'Tiled road', res.content)
+        self.assertEqual(empty.content, b'')
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(tile_url(1, 1, 0))
+        self.assertEqual(cached.content, res.content)
+
+        Velocity_Reads.objects.create(road=road, read_value=Decimal('60'))
+        res = self.client.get(tile_url(1, 1, 0))
+        self.assertIn(b'alta', res.content)
+
+    def test_road_tile_invalidation_scoped(self):
+        """Test tiles are only invalidated where a road changes intensity class."""
+        cache.clear()
+        road = create_road(name='Tiled road')
+        create_road(
+            name='Far road',
+            segment=LineString((-8.61, 41.15), (-8.60, 41.16)),
+        )
+        Velocity_Reads.objects.create(road=road, read_value=Decimal('60'))
+        far = self.client.get(tile_url(1, 0, 0))
+        near = self.client.get(tile_url(1, 1, 0))
+        self.assertIn(b'Far road', far.content)
+
+        Velocity_Reads.objects.create(road=road, read_value=Decimal('65'))
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(tile_url(1, 1, 0)).content, near.content)
+
+        Velocity_Reads.objects.create(road=road, read_value=Decimal('1'))
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(tile_url(1, 0, 0)).content, far.content)
+        self.assertIn(b'baixa', self.client.get(tile_url(1, 1, 0)).content)
+
+    def test_road_tile_out_of_range(self):
+        """Test tiles outside the zoom level grid are not found."""
+        res = self.client.get(tile_url(1, 2, 0))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
     def test_update_road_notAlow(self):
         """Test road update error for unauthenticated user."""
 
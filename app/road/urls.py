@@ -20,5 +20,6 @@ router.register('classification', views.ClassificationViewSet)
 app_name = 'road'
 
 urlpatterns = [
+    path('tiles/<int:z>/<int:x>/<int:y>.mvt', views.RoadTileView.as_view(), name='road-tile'),
     path('', include(router.urls))
 ]
@@ -2,57 +2,328 @@
 Views for the road APIs.
 """
 
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.gis.db.models.functions import AsGeoJSON
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django_filters.rest_framework import DjangoFilterBackend
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter
 from rest_framework import (
     viewsets,
     mixins,
+    status,
 )
-from rest_framework.authentication import TokenAuthentication
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
 
+from core.authentication import CachedTokenAuthentication
+from core.ingest_queue import enqueue_response, wants_async
+from core.pagination import KeysetPaginationMixin
+from core.tiles import MAX_ZOOM, get_road_tile, is_valid_tile
 from core.models import (
+    SEGMENT_SIMPLIFICATIONS,
     Road,
+    RoadSpeedRollup,
     Velocity_Reads,
     Classification
 )
 from road import serializers
+from road.filter import RoadFilter
+
+
+
+
+MAX_STATS_ROADS = 100
+MAX_BULK_READS = 10000
+
+STATS_PARAMETERS = [
+    OpenApiParameter(
+        name='bucket',
+        description='Bucket size: 5m, 1h or 1d (default 1h)',
+        required=False,
+        type=str,
+        location=OpenApiParameter.QUERY
+    ),
+    OpenApiParameter(
+        name='from',
+        description='Start of the window (default: 24h before "to")',
+        required=False,
+        type=str,
+        location=OpenApiParameter.QUERY
+    ),
+    OpenApiParameter(
+        name='to',
+        description='End of the window (default: now)',
+        required=False,
+        type=str,
+        location=OpenApiParameter.QUERY
+    ),
+]
+
+GEOMETRY_PARAMETERS = [
+    OpenApiParameter(
+        name='simplify',
+        description='Simplified segment variant: none, fine (~5 m), medium (~50 m) or coarse (~500 m)',
+        required=False,
+        type=str,
+        location=OpenApiParameter.QUERY
+    ),
+    OpenApiParameter(
+        name='zoom',
+        description='Map zoom level (0-22) the simplified segment variant is picked for',
+        required=False,
+        type=int,
+        location=OpenApiParameter.QUERY
+    ),
+    OpenApiParameter(
+        name='precision',
+        description='Decimal places kept in the segment coordinates (0-15)',
+        required=False,
+        type=int,
+        location=OpenApiParameter.QUERY
+    ),
+]
 
 
+def stream_feature_collection(rows, chunk_size):
+    """
+    Yield a GeoJSON FeatureCollection, in the RoadSerializer layout, from
+    (id, name, length, total_reads, intensity, geometry json) rows, chunk_size
+    features at a time.
+    """
+    yield '{"type":"FeatureCollection","features":['
+    features = []
+    first = True
+    for road_id, name, length, total_reads, intensity, geometry in rows:
+        properties = json.dumps({
+            'name': name,
+            'length': length,
+            'total_reads': total_reads,
+            'intensity': intensity,
+        })
+        features.append(
+            f'{{"id":{road_id},"type":"Feature","geometry":{geometry},"properties":{properties}}}'
+        )
+        if len(features) == chunk_size:
+            yield ('' if first else ',') + ','.join(features)
+            features, first = [], False
+    if features:
+        yield ('' if first else ',') + ','.join(features)
+    yield ']}'
 
 
+@extend_schema_view(
+    list=extend_schema(parameters=GEOMETRY_PARAMETERS),
+    retrieve=extend_schema(parameters=GEOMETRY_PARAMETERS),
+)
 class RoadViewSet(viewsets.ModelViewSet):
     """View for manage Road APIs.(road/views.py)"""
 
     serializer_class = serializers.RoadSerializer
     queryset = Road.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticatedOrReadOnly]
-    
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = RoadFilter
+
+    def get_geometry_options(self):
+        """Return the segment variant and precision selected by the query parameters."""
+        if not hasattr(self, '_geometry_options'):
+            params = {
+                key: self.request.query_params[key]
+                for key in ('simplify', 'zoom', 'precision')
+                if key in self.request.query_params
+            }
+            query = serializers.RoadGeometryQuerySerializer(data=params)
+            query.is_valid(raise_exception=True)
+            self._geometry_options = query.get_options()
+        return self._geometry_options
+
+    def get_serializer_context(self):
+        """Pass the segment variant and precision to SegmentField."""
+        context = super().get_serializer_context()
+        if self.request is not None:
+            context.update(self.get_geometry_options())
+        return context
 
     def get_queryset(self):
-        """Retrive roads ."""
-        return self.queryset.order_by('-id')
+        """Retrive roads with their read state annotated, loading one segment variant."""
+        variant = self.get_geometry_options()['segment_variant'] if self.request else None
+        return self.queryset.with_read_state(
+            from_reads=settings.ROAD_READ_STATE_FROM_READS
+        ).defer(
+            *(f'segment_{v}' for v in SEGMENT_SIMPLIFICATIONS if v != variant)
+        ).order_by('-id')
+
+    def get_rollups(self, request):
+        """Return the rollups selected by the bucket/from/to query parameters."""
+        params = {
+            key: request.query_params[param]
+            for key, param in (('bucket', 'bucket'), ('start', 'from'), ('end', 'to'))
+            if param in request.query_params
+        }
+        query = serializers.RoadStatsQuerySerializer(data=params)
+        query.is_valid(raise_exception=True)
+
+        end = query.validated_data.get('end') or timezone.now()
+        start = query.validated_data.get('start') or end - timedelta(hours=24)
+        return RoadSpeedRollup.objects.filter(
+            bucket=query.validated_data['bucket'],
+            bucket_start__gte=start,
+            bucket_start__lt=end,
+        ).order_by('bucket_start')
+
+    @extend_schema(responses=OpenApiTypes.OBJECT)
+    @action(methods=['get'], detail=False)
+    def export(self, request):
+        """
+        Stream the filtered road network as a GeoJSON FeatureCollection.
+        Geometries are encoded by PostGIS and rows read through a server-side cursor.
+        """
+        rows = self.filter_queryset(self.get_queryset()).annotate(
+            geojson=AsGeoJSON('segment')
+        ).order_by('id').values_list(
+            'id', 'name', 'length', 'reads_count', 'intensity_class', 'geojson'
+        )
+        chunk_size = settings.ROAD_EXPORT_CHUNK_SIZE
+        response = StreamingHttpResponse(
+            stream_feature_collection(rows.iterator(chunk_size=chunk_size), chunk_size),
+            content_type='application/geo+json',
+        )
+        response['Content-Disposition'] = 'attachment; filename="roads.geojson"'
+        return response
+
+    @extend_schema(
+        parameters=STATS_PARAMETERS,
+        responses=serializers.RoadSpeedRollupSerializer(many=True),
+    )
+    @action(methods=['get'], detail=True)
+    def stats(self, request, pk=None):
+        """Speed statistics of a road per time bucket."""
+        road = self.get_object()
+        rollups = self.get_rollups(request).filter(road=road)
+        serializer = serializers.RoadSpeedRollupSerializer(rollups, many=True)
+        return Response(serializer.data)
+
+    @extend_schema(
+        parameters=STATS_PARAMETERS + [
+            OpenApiParameter(
+                name='roads',
+                description='Comma separated road ids',
+                required=True,
+                type=str,
+                location=OpenApiParameter.QUERY
+            ),
+        ],
+    )
+    @action(methods=['get'], detail=False, url_path='stats', url_name='stats-list')
+    def multi_stats(self, request):
+        """Speed statistics of several roads per time bucket."""
+        try:
+            road_ids = [int(i) for i in request.query_params.get('roads', '').split(',') if i]
+        except ValueError:
+            road_ids = None
+        if not road_ids or len(road_ids) > MAX_STATS_ROADS:
+            return Response(
+                {"detail": f"roads must list between 1 and {MAX_STATS_ROADS} road ids."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        rollups = self.get_rollups(request).filter(road_id__in=road_ids)
+        grouped = {road_id: [] for road_id in road_ids}
+        for rollup in rollups:
+            grouped[rollup.road_id].append(rollup)
+        return Response({
+            'results': [
+                {
+                    'road': road_id,
+                    'stats': serializers.RoadSpeedRollupSerializer(items, many=True).data,
+                }
+                for road_id, items in grouped.items()
+            ]
+        })
     
 
 
-class ReadViewSet(viewsets.ModelViewSet):
+class RoadTileView(APIView):
+    """Mapbox Vector Tile of the roads with their intensity class."""
+
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticatedOrReadOnly]
+
+    @extend_schema(responses={200: OpenApiTypes.BINARY})
+    def get(self, request, z, x, y):
+        """Return the tile z/x/y of the 'roads' layer."""
+        if not is_valid_tile(z, x, y):
+            return Response(
+                {"detail": f"Tile must have 0 <= z <= {MAX_ZOOM} and 0 <= x, y < 2^z."},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return HttpResponse(get_road_tile(z, x, y), content_type='application/vnd.mapbox-vector-tile')
+
+
+class ReadViewSet(KeysetPaginationMixin, viewsets.ModelViewSet):
     """View for manage Read Apis.(read/)"""
 
     serializer_class = serializers.ReadSerializer
     queryset = Velocity_Reads.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticatedOrReadOnly]
 
     def get_queryset(self):
         """Retrive roads ."""
         return self.queryset.order_by('-read_at')
 
+    def create(self, request, *args, **kwargs):
+        """
+        Create a read, or a batch of reads when given a JSON array.
+        With `Prefer: respond-async` the valid reads are queued and answered with 202.
+        """
+        is_async = wants_async(request)
+        if not isinstance(request.data, list) and not is_async:
+            return super().create(request, *args, **kwargs)
+
+        items = request.data if isinstance(request.data, list) else [request.data]
+        if len(items) > MAX_BULK_READS:
+            return Response(
+                {"detail": f"At most {MAX_BULK_READS} reads per request."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        reads, errors = serializers.validate_read_batch(items)
+        if not reads:
+            return Response({"created": [], "errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        if is_async:
+            accepted_at = timezone.now().isoformat()
+            queued = [
+                {'road': read.road_id, 'read_value': str(read.read_value), 'read_at': accepted_at}
+                for read in reads
+            ]
+            return enqueue_response('velocity-reads', queued, errors=errors)
+
+        reads = Velocity_Reads.objects.bulk_ingest(reads)
+        return Response(
+            {
+                "created": serializers.ReadSerializer(reads, many=True).data,
+                "errors": errors,
+            },
+            status=status.HTTP_201_CREATED
+        )
+
 class ClassificationViewSet(mixins.UpdateModelMixin,
                             mixins.ListModelMixin,
                             viewsets.GenericViewSet):
     """Manage Classification in database"""
     serializer_class = serializers.ClassificationSerializer
     queryset = Classification.objects.filter(id=1)
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticatedOrReadOnly]
     pagination_class = None
 
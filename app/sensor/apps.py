@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class SensorConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'sensor'
+
+    def ready(self):
+        """Connect the signal handlers."""
+        from sensor import signals  # noqa: F401
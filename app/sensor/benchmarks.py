@@ -0,0 +1,123 @@
+"""
+Benchmarks for the sensor APIs, run with `manage.py benchmark`.
+"""
+
+import uuid
+from datetime import timedelta
+
+from django.contrib.gis.geos import LineString
+from django.utils import timezone
+
+from core.models import Car, Plates_Reads, Road, Sensor
+from sensor.identity import clear_identity_caches, identity_cache_stats
+from sensor.ingest import ingest_plate_reads
+from sensor.serializers import (
+    PLatesReadSerializer,
+    create_plate_reads,
+    group_by_plate,
+    pass_by_rows,
+    plate_read_rows,
+    serialize_plate_read_rows,
+)
+
+
+def make_plate_reads(size, road, sensor, plates=1000):
+    """Return size plate read payloads over a repeating set of plates."""
+    now = timezone.now()
+    return [
+        {
+            'road_segment': road.id,
+            'car__license_plate': f'BM{i % plates:06d}',
+            'sensor__uuid': str(sensor.uuid),
+            'timestamp': (now - timedelta(seconds=i)).isoformat(),
+        }
+        for i in range(size)
+    ]
+
+
+def benchmark_fixtures():
+    road = Road.objects.create(
+        name=f'Benchmark road {uuid.uuid4()}',
+        segment=LineString((103.9460064, 30.75066046), (103.9564943, 30.7450801)),
+        length=1179.2,
+    )
+    sensor = Sensor.objects.create(name='Benchmark sensor', uuid=uuid.uuid4())
+    return road, sensor
+
+
+def plate_ingest(size, timer, report):
+    """Compare the serializer create path with the COPY ingestion path."""
+    road, sensor = benchmark_fixtures()
+    payload = make_plate_reads(size, road, sensor)
+
+    def serializer_create():
+        serializer = PLatesReadSerializer(data=payload, many=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+    timer('PLatesReadSerializer(many=True).save()', size, serializer_create)
+    timer('COPY ingestion', size, ingest_plate_reads, payload)
+
+
+def plate_read_list(size, timer, report):
+    """Compare rendering plate reads through PLatesReadSerializer and through values()."""
+    road, sensor = benchmark_fixtures()
+    ingest_plate_reads(make_plate_reads(size, road, sensor))
+    reads = Plates_Reads.objects.filter(sensor=sensor).order_by('-read_at')
+
+    def serializer_data():
+        queryset = reads.select_related('sensor', 'car_plate', 'road_segment')
+        return PLatesReadSerializer(queryset, many=True).data
+
+    def values_data():
+        return serialize_plate_read_rows(plate_read_rows(reads))
+
+    timer('PLatesReadSerializer(many=True).data', size, serializer_data)
+    timer('values() fast path', size, values_data)
+
+
+def pass_by(size, timer, report):
+    """Compare a pass-by lookup per plate with one lookup for all plates."""
+    road, sensor = benchmark_fixtures()
+    plates = max(size // 10, 1)
+    ingest_plate_reads(make_plate_reads(size, road, sensor, plates=plates))
+    wanted = [f'BM{i:06d}' for i in range(plates)]
+    end = timezone.now() + timedelta(seconds=1)
+    start = end - timedelta(hours=24)
+
+    def per_plate():
+        results = []
+        for plate in wanted:
+            car = Car.objects.get(license_plate=plate)
+            reads = plate_read_rows(
+                Plates_Reads.objects.filter(car_plate=car, read_at__gte=start, read_at__lt=end)
+            )
+            results.append(serialize_plate_read_rows(reads))
+        return results
+
+    def batched():
+        return group_by_plate(pass_by_rows(wanted, start, end))
+
+    report('plates', plates)
+    timer('one lookup per plate', size, per_plate)
+    timer('one lookup for all plates', size, batched)
+
+
+def plate_create(size, timer, report, batch=10):
+    """Compare small plate read batches with cold and warm identity caches."""
+    road, sensor = benchmark_fixtures()
+    serializer = PLatesReadSerializer(data=make_plate_reads(size, road, sensor), many=True)
+    serializer.is_valid(raise_exception=True)
+    items = serializer.validated_data
+    batches = [items[i:i + batch] for i in range(0, size, batch)]
+
+    def create(cold):
+        for chunk in batches:
+            if cold:
+                clear_identity_caches()
+            create_plate_reads(chunk)
+
+    timer(f'batches of {batch}, cold identity caches', size, create, True)
+    clear_identity_caches()
+    timer(f'batches of {batch}, warm identity caches', size, create, False)
+    report('identity caches', identity_cache_stats())
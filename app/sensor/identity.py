@@ -0,0 +1,82 @@
+"""
+Per-process identity caches for the plate read ingestion: sensor uuid to
+sensor and license plate to car. Both mappings are small and nearly
+immutable compared with the read volume.
+"""
+
+from django.conf import settings
+
+from core.lru import LRUCache
+from core.models import Car, Sensor
+
+sensor_cache = LRUCache(
+    maxsize=settings.IDENTITY_CACHE_SENSORS,
+    ttl=settings.IDENTITY_CACHE_TTL,
+)
+car_cache = LRUCache(
+    maxsize=settings.IDENTITY_CACHE_CARS,
+    ttl=settings.IDENTITY_CACHE_TTL,
+)
+
+
+def resolve_sensors(uuids):
+    """Return {uuid: Sensor} of the known uuids, querying only the uncached ones."""
+    found, missing = {}, []
+    for uuid in uuids:
+        sensor = sensor_cache.get(uuid)
+        if sensor is None:
+            missing.append(uuid)
+        else:
+            found[uuid] = sensor
+    if missing:
+        for sensor in Sensor.objects.filter(uuid__in=missing):
+            sensor_cache.set(sensor.uuid, sensor)
+            found[sensor.uuid] = sensor
+    return found
+
+
+def resolve_cars(plates):
+    """
+    Return {plate: Car} for the plates, creating the unseen cars with one
+    upsert and querying only the uncached plates.
+    """
+    found, missing = {}, []
+    for plate in plates:
+        car = car_cache.get(plate)
+        if car is None:
+            missing.append(plate)
+        else:
+            found[plate] = car
+    if missing:
+        # INSERT ... ON CONFLICT DO NOTHING, safe against concurrent sensors
+        Car.objects.bulk_create(
+            [Car(license_plate=plate) for plate in sorted(missing)], ignore_conflicts=True
+        )
+        for car in Car.objects.filter(license_plate__in=missing).only('id', 'license_plate'):
+            car_cache.set(car.license_plate, car)
+            found[car.license_plate] = car
+    return found
+
+
+def forget_sensor(pk):
+    """Drop a changed or deleted sensor from the cache."""
+    sensor_cache.delete_where(lambda uuid, sensor: sensor.pk == pk)
+
+
+def forget_car(pk):
+    """Drop a changed or deleted car from the cache."""
+    car_cache.delete_where(lambda plate, car: car.pk == pk)
+
+
+def clear_identity_caches():
+    """Drop every cached sensor and car."""
+    sensor_cache.clear()
+    car_cache.clear()
+
+
+def identity_cache_stats():
+    """Return the size and hit/miss counters of both caches."""
+    return {
+        'sensors': sensor_cache.stats(),
+        'cars': car_cache.stats(),
+    }
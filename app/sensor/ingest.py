@@ -0,0 +1,158 @@
+"""
+High volume plate read ingestion through PostgreSQL COPY.
+"""
+
+import csv
+import io
+import uuid
+import zlib
+from datetime import timezone as dt_timezone
+from itertools import islice
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils.dateparse import parse_datetime
+
+from core.models import Car, Plates_Reads, Road, Sensor
+
+MAX_PLATE_LENGTH = Car._meta.get_field('license_plate').max_length
+
+# Largest id of a PostgreSQL bigint, ids past it fail the COPY.
+MAX_ROAD_ID = 2 ** 63 - 1
+
+STAGING_TABLE = 'plates_reads_staging'
+
+MAX_REPORTED_ERRORS = 1000
+
+# Raised while a streamed upload is read: truncated or invalid gzip, broken CSV.
+STREAM_ERRORS = (EOFError, OSError, zlib.error, csv.Error)
+
+
+def parse_plate_read(item):
+    """
+    Validate one plate read payload without touching the database.
+    Return (road_id, license_plate, sensor_uuid, read_at) or raise ValueError.
+    """
+    if not isinstance(item, dict):
+        raise ValueError('Expected an object.')
+    try:
+        road_id = item['road_segment']
+        if isinstance(road_id, bool) or (isinstance(road_id, float) and not road_id.is_integer()):
+            raise ValueError
+        road_id = int(road_id)
+        plate = str(item['car__license_plate']).strip()
+        sensor_uuid = uuid.UUID(str(item['sensor__uuid']))
+        read_at = parse_datetime(str(item['timestamp']))
+    except KeyError as error:
+        raise ValueError(f'Missing field {error.args[0]}.')
+    except (TypeError, ValueError):
+        raise ValueError('Invalid road_segment, sensor__uuid or timestamp.')
+
+    if not 1 <= road_id <= MAX_ROAD_ID:
+        raise ValueError('Invalid road_segment.')
+    if not plate or len(plate) > MAX_PLATE_LENGTH:
+        raise ValueError(f'car__license_plate must have 1 to {MAX_PLATE_LENGTH} characters.')
+    if '\x00' in plate:
+        raise ValueError('car__license_plate must not contain NUL characters.')
+    if read_at is None:
+        raise ValueError('Invalid timestamp.')
+    if read_at.tzinfo is None:
+        read_at = read_at.replace(tzinfo=dt_timezone.utc)
+    return road_id, plate, sensor_uuid, read_at
+
+
+def copy_plate_reads(rows):
+    """
+    Insert parsed plate reads with COPY into a staging table, then upsert the
+    cars and resolve sensors and roads with set-based SQL.
+    Rows whose sensor or road is unknown are skipped. Return the insert count.
+    """
+    if not rows:
+        return 0
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for road_id, plate, sensor_uuid, read_at in rows:
+        writer.writerow((road_id, plate, sensor_uuid, read_at.isoformat()))
+    buffer.seek(0)
+
+    qn = connection.ops.quote_name
+    cars = qn(Car._meta.db_table)
+    reads = qn(Plates_Reads._meta.db_table)
+    sensors = qn(Sensor._meta.db_table)
+    roads = qn(Road._meta.db_table)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            CREATE TEMPORARY TABLE {STAGING_TABLE} (
+                road_id bigint,
+                license_plate varchar({MAX_PLATE_LENGTH}),
+                sensor_uuid uuid,
+                read_at timestamptz
+            ) ON COMMIT DROP
+            """
+        )
+        cursor.copy_expert(f'COPY {STAGING_TABLE} FROM STDIN WITH (FORMAT csv)', buffer)
+        cursor.execute(
+            f"""
+            INSERT INTO {cars} (license_plate, created_at)
+            SELECT DISTINCT license_plate, now() FROM {STAGING_TABLE}
+            ORDER BY license_plate
+            ON CONFLICT (license_plate) DO NOTHING
+            """
+        )
+        cursor.execute(
+            f"""
+            INSERT INTO {reads} (road_segment_id, car_plate_id, sensor_id, read_at)
+            SELECT s.road_id, c.id, se.id, s.read_at
+            FROM {STAGING_TABLE} s
+            JOIN {cars} c ON c.license_plate = s.license_plate
+            JOIN {sensors} se ON se.uuid = s.sensor_uuid
+            JOIN {roads} r ON r.id = s.road_id
+            """
+        )
+        created = cursor.rowcount
+        cursor.execute(f'DROP TABLE {STAGING_TABLE}')
+    return created
+
+
+def ingest_plate_reads(items, chunk_size=None):
+    """
+    Validate and COPY plate read payloads from any iterable, one fixed-size
+    chunk at a time, so a streamed upload is never held in memory at once.
+    Return a report with the created count and the rejected items. If the
+    upload turns out to be malformed the report stops there, with a 'detail'
+    and the counts of the chunks already committed.
+    """
+    chunk_size = chunk_size or settings.PLATE_INGEST_CHUNK_SIZE
+    report = {
+        'received': 0,
+        'created': 0,
+        'unresolved': 0,  # unknown sensor or road
+        'rejected_count': 0,
+        'rejected': [],
+    }
+    items = iter(items)
+    while True:
+        try:
+            chunk = list(islice(items, chunk_size))
+        except STREAM_ERRORS as error:
+            report['detail'] = f'Malformed upload after {report["received"]} reads: {error}'
+            return report
+        if not chunk:
+            return report
+
+        rows = []
+        for index, item in enumerate(chunk, start=report['received']):
+            try:
+                rows.append(parse_plate_read(item))
+            except ValueError as error:
+                report['rejected_count'] += 1
+                if len(report['rejected']) < MAX_REPORTED_ERRORS:
+                    report['rejected'].append({'index': index, 'errors': str(error)})
+
+        created = copy_plate_reads(rows)
+        report['received'] += len(chunk)
+        report['created'] += created
+        report['unresolved'] += len(rows) - created
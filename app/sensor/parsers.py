@@ -0,0 +1,64 @@
+"""
+Streaming parsers for plate read uploads.
+"""
+
+import csv
+import gzip
+
+import orjson
+
+from django.conf import settings
+from rest_framework.parsers import BaseParser
+
+
+class StreamingParser(BaseParser):
+    """
+    Base for parsers that return a lazy iterator of items read line by line
+    from the request stream (optionally gzip encoded) instead of the whole body.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        if stream is None:
+            return iter(())
+
+        request = parser_context.get('request')
+        if request is not None and request.META.get('HTTP_CONTENT_ENCODING', '').lower() == 'gzip':
+            stream = gzip.GzipFile(fileobj=stream, mode='rb')
+
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        lines = (raw.decode(encoding, errors='replace') for raw in stream)
+        return self.parse_lines(lines)
+
+    def parse_lines(self, lines):
+        raise NotImplementedError('.parse_lines() must be overridden.')
+
+
+class NDJSONParser(StreamingParser):
+    """
+    Parse newline delimited JSON, one object per line. Lines that are not
+    valid JSON are yielded as is so the ingestion reports them.
+    """
+
+    media_type = 'application/x-ndjson'
+
+    def parse_lines(self, lines):
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield orjson.loads(line)
+            except ValueError:
+                yield line
+
+
+class CSVParser(StreamingParser):
+    """
+    Parse CSV with a header row, one object per row.
+    """
+
+    media_type = 'text/csv'
+
+    def parse_lines(self, lines):
+        return csv.DictReader(lines)
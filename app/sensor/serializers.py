@@ -2,7 +2,9 @@
 Serializers for Road APIs
 """
 
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
+from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema_field
 
 
@@ -13,6 +15,8 @@ from core.models import (
     Car,
     Plates_Reads
 )
+from sensor.identity import clear_identity_caches, resolve_cars, resolve_sensors
+from sensor.ingest import MAX_ROAD_ID
 
 
 
@@ -33,21 +37,184 @@ class CarSerializer(serializers.ModelSerializer):
         fields=['id','license_plate','created_at']
 
 
+@extend_schema_field(OpenApiTypes.OBJECT)
+class RoadSegmentField(serializers.IntegerField):
+    """
+    Road of a plate read: a road id on write, validated like an IntegerField
+    within the bigint range, the road id and name on read.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('min_value', 1)
+        kwargs.setdefault('max_value', MAX_ROAD_ID)
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return {
+            "id": value.id,
+            "name": value.name,
+        }
+
+
+def create_plate_reads(items):
+    """
+    Create the plate reads of validated items with a constant number of
+    queries: sensors and cars come from the identity caches, the database is
+    only asked for uncached ones, plus one bulk insert for the reads.
+    """
+    try:
+        return _create_plate_reads(items)
+    except IntegrityError:
+        # a cached sensor or car was deleted by another process. The foreign
+        # keys are deferred, so the violation is only raised here when the
+        # atomic() of _create_plate_reads is the outermost transaction and
+        # commits; inside an outer transaction it surfaces at that commit.
+        clear_identity_caches()
+        return _create_plate_reads(items)
+
+
+def _create_plate_reads(items):
+    sensor_uuids = {item['sensor__uuid'] for item in items}
+    road_ids = {item['road_segment'] for item in items}
+    plates = {item['car__license_plate'] for item in items}
+
+    with transaction.atomic():
+        sensors = resolve_sensors(sensor_uuids)
+        if len(sensors) != len(sensor_uuids):
+            raise serializers.ValidationError("Sensor not recognized")
+
+        roads = Road.objects.only('id', 'name').in_bulk(road_ids)
+        if len(roads) != len(road_ids):
+            raise serializers.ValidationError("Road segment not recognized")
+
+        cars = resolve_cars(plates)
+
+        return Plates_Reads.objects.bulk_create([
+            Plates_Reads(
+                road_segment=roads[item['road_segment']],
+                car_plate=cars[item['car__license_plate']],
+                sensor=sensors[item['sensor__uuid']],
+                read_at=item['read_at'],
+            )
+            for item in items
+        ])
+
+
+PLATE_READ_COLUMNS = (
+    'id',
+    'read_at',
+    'road_segment_id',
+    'road_segment__name',
+    'car_plate_id',
+    'car_plate__license_plate',
+    'sensor_id',
+    'sensor__uuid',
+    'sensor__name',
+)
+
+_timestamp_field = serializers.DateTimeField()
+
+
+def plate_read_rows(queryset):
+    """Project the columns of the PLatesReadSerializer representation, never the geometry."""
+    return queryset.values(*PLATE_READ_COLUMNS)
+
+
+def serialize_plate_read_rows(rows):
+    """
+    Render plate_read_rows the way PLatesReadSerializer renders instances,
+    without building model instances or serializer fields per row.
+    """
+    to_timestamp = _timestamp_field.to_representation
+    return [
+        {
+            "id": row['id'],
+            "road_segment": {
+                "id": row['road_segment_id'],
+                "name": row['road_segment__name'],
+            },
+            "car": {
+                "id": row['car_plate_id'],
+                "license_plate": row['car_plate__license_plate'],
+            },
+            "sensor": {
+                "id": row['sensor_id'],
+                "uuid": str(row['sensor__uuid']),
+                "name": row['sensor__name'],
+            },
+            "timestamp": to_timestamp(row['read_at']),
+        }
+        for row in rows
+    ]
+
+
+MAX_PASS_BY_PLATES = 5000
+
+
+class PassByQuerySerializer(serializers.Serializer):
+    """Serializer for the plates and time window of a pass-by lookup."""
+    plates = serializers.ListField(
+        child=serializers.CharField(max_length=15),
+        min_length=1,
+        max_length=MAX_PASS_BY_PLATES,
+    )
+    start = serializers.DateTimeField(required=False)
+    end = serializers.DateTimeField(required=False)
+
+    def validate(self, attrs):
+        if 'start' in attrs and 'end' in attrs and attrs['start'] >= attrs['end']:
+            raise serializers.ValidationError('"from" must be before "to".')
+        return attrs
+
+
+def pass_by_rows(plates, start, end):
+    """
+    Reads of the plates in [start, end), in one join of the reads with the
+    cars on the (car_plate, read_at) index, ordered by plate then time.
+    """
+    return plate_read_rows(
+        Plates_Reads.objects.filter(
+            car_plate__license_plate__in=plates,
+            read_at__gte=start,
+            read_at__lt=end,
+        ).order_by('car_plate__license_plate', 'read_at', 'id')
+    )
+
+
+def group_by_plate(rows):
+    """Render plate_read_rows grouped per license plate, in row order."""
+    groups = {}
+    for read in serialize_plate_read_rows(rows):
+        groups.setdefault(read['car']['license_plate'], []).append(read)
+    return [
+        {"license_plate": plate, "reads": reads}
+        for plate, reads in groups.items()
+    ]
+
+
+class PLatesReadListSerializer(serializers.ListSerializer):
+    """Create a list of plate reads in one set-based batch."""
+
+    def create(self, validated_data):
+        return create_plate_reads(validated_data)
+
+
 class PLatesReadSerializer(serializers.ModelSerializer):
     """Serializer for plates read view."""
     """Add field to validated_data"""
     # Campos de escrita
     sensor__uuid = serializers.UUIDField(write_only=True)
-    car__license_plate = serializers.CharField(write_only=True)
+    car__license_plate = serializers.CharField(write_only=True, max_length=15)
     timestamp = serializers.DateTimeField(source='read_at')
 
     # Campos de leitura
     sensor = serializers.SerializerMethodField(read_only=True)
     car = serializers.SerializerMethodField(read_only=True)
-    road_segment = serializers.StringRelatedField(read_only=True)
+    road_segment = RoadSegmentField()
 
     class Meta:
         model = Plates_Reads
+        list_serializer_class = PLatesReadListSerializer
         fields = [
             'id',
             'road_segment',
@@ -76,16 +243,22 @@ class PLatesReadSerializer(serializers.ModelSerializer):
 
     def create(self,validated_data):
         """Create a Plate Read"""
-        licence = validated_data.pop('car__license_plate')
-        sensor_uuid = validated_data.pop('sensor__uuid')
-        car_plate,_ = Car.objects.get_or_create(license_plate=licence)
-        try:
-            sensor = Sensor.objects.get(uuid=sensor_uuid)
-        except Sensor.DoesNotExist:
-            raise serializers.ValidationError("Sensor not recognized")
-        
-        return Plates_Reads.objects.create(
-            sensor = sensor,
-            car_plate=car_plate,
-            **validated_data
-        )
\ No newline at end of file
+        return create_plate_reads([validated_data])[0]
+
+    def update(self, instance, validated_data):
+        """Update a Plate Read"""
+        if 'road_segment' in validated_data:
+            try:
+                validated_data['road_segment'] = Road.objects.get(pk=validated_data['road_segment'])
+            except Road.DoesNotExist:
+                raise serializers.ValidationError("Road segment not recognized")
+        if 'sensor__uuid' in validated_data:
+            try:
+                validated_data['sensor'] = Sensor.objects.get(uuid=validated_data.pop('sensor__uuid'))
+            except Sensor.DoesNotExist:
+                raise serializers.ValidationError("Sensor not recognized")
+        if 'car__license_plate' in validated_data:
+            validated_data['car_plate'], _ = Car.objects.get_or_create(
+                license_plate=validated_data.pop('car__license_plate')
+            )
+        return super().update(instance, validated_data)
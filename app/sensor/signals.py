@@ -0,0 +1,24 @@
+"""
+Signal handlers for the sensor app.
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.models import Car, Sensor
+from sensor.identity import forget_car, forget_sensor
+
+
+@receiver(post_save, sender=Sensor)
+@receiver(post_delete, sender=Sensor)
+def forget_cached_sensor(sender, instance, **kwargs):
+    """Drop a changed or deleted sensor from the identity cache."""
+    forget_sensor(instance.pk)
+
+
+@receiver(post_save, sender=Car)
+@receiver(post_delete, sender=Car)
+def forget_cached_car(sender, instance, created=False, **kwargs):
+    """Drop a changed or deleted car from the identity cache."""
+    if not created:
+        forget_car(instance.pk)
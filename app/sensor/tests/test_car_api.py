@@ -0,0 +1,129 @@
+"""
+Test for car APIs.
+"""
+
+import uuid
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.gis.geos import LineString
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (
+    Car,
+    Plates_Reads,
+    Road,
+    Sensor,
+)
+
+PASS_BY_URL = reverse('sensor:car-get-by-plate')
+
+
+def create_user(email='user@example.com', password='testpass123'):
+    """Create and return a user with given parameters."""
+    return get_user_model().objects.create_user(email=email, password=password)
+
+
+def create_read(road, sensor, plate, read_at):
+    """Create and return a plate read of plate."""
+    car, _ = Car.objects.get_or_create(license_plate=plate)
+    return Plates_Reads.objects.create(
+        road_segment=road, car_plate=car, sensor=sensor, read_at=read_at
+    )
+
+
+class PassByApiTests(TestCase):
+    """
+    Test the car pass-by API.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.road = Road.objects.create(
+            name='Road name',
+            segment=LineString((103.9460064, 30.75066046), (103.9564943, 30.7450801)),
+            length=1179.2,
+        )
+        self.sensor = Sensor.objects.create(name='Sensor name', uuid=uuid.uuid4())
+        self.now = timezone.now()
+        self.reads = {
+            'AA16AA': [
+                create_read(self.road, self.sensor, 'AA16AA', self.now - timedelta(hours=2)),
+                create_read(self.road, self.sensor, 'AA16AA', self.now - timedelta(hours=1)),
+            ],
+            'BB17BB': [
+                create_read(self.road, self.sensor, 'BB17BB', self.now - timedelta(hours=3)),
+            ],
+        }
+        create_read(self.road, self.sensor, 'AA16AA', self.now - timedelta(hours=30))
+        create_read(self.road, self.sensor, 'CC18CC', self.now - timedelta(hours=1))
+
+    def assertGrouped(self, results, expected):
+        """Assert results hold the expected plates with their read ids in time order."""
+        self.assertEqual(
+            {group['license_plate']: [r['id'] for r in group['reads']] for group in results},
+            {plate: [r.id for r in self.reads[plate]] for plate in expected},
+        )
+
+    def test_pass_by_single_plate(self):
+        """Test the reads of a plate in the last 24h."""
+        res = self.client.get(PASS_BY_URL, {'license_plate': 'AA16AA'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['count'], 2)
+        self.assertGrouped(res.data['results'], ['AA16AA'])
+
+    def test_pass_by_many_plates(self):
+        """Test several plates are resolved in one query and grouped per plate."""
+        with self.assertNumQueries(2):  # count and page
+            res = self.client.get(PASS_BY_URL, {'plates': 'AA16AA,BB17BB,ZZ99ZZ'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['count'], 3)
+        self.assertGrouped(res.data['results'], ['AA16AA', 'BB17BB'])
+
+    def test_pass_by_window_and_pagination(self):
+        """Test the from/to window and the pagination over the reads."""
+        params = {
+            'license_plate': ['AA16AA', 'BB17BB'],
+            'from': (self.now - timedelta(hours=48)).isoformat(),
+            'to': (self.now - timedelta(minutes=90)).isoformat(),
+            'limit': 2,
+        }
+
+        res = self.client.get(PASS_BY_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['count'], 3)
+        self.assertIsNotNone(res.data['next'])
+        self.assertEqual(
+            [r['read_at'] for r in Plates_Reads.objects.filter(
+                id__in=[r['id'] for g in res.data['results'] for r in g['reads']]
+            ).order_by('read_at').values('read_at')],
+            [self.now - timedelta(hours=30), self.now - timedelta(hours=2)],
+        )
+
+    def test_pass_by_post(self):
+        """Test a plate list can be posted by an authenticated client."""
+        self.client.force_authenticate(create_user())
+
+        res = self.client.post(PASS_BY_URL, {'plates': ['BB17BB']}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertGrouped(res.data['results'], ['BB17BB'])
+
+    def test_pass_by_requires_plates(self):
+        """Test missing plates or an inverted window are rejected."""
+        for params in (
+            {},
+            {'license_plate': 'AA16AA', 'from': self.now.isoformat(), 'to': self.now.isoformat()},
+        ):
+            with self.subTest(params=params):
+                res = self.client.get(PASS_BY_URL, params)
+
+                self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,424 @@
+"""
+Test for plates read APIs.
+"""
+
+import gzip
+import json
+import os
+import tempfile
+import uuid
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.gis.geos import LineString
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_api_key.models import APIKey
+
+from core.ingest_queue import IngestQueue
+from core.models import (
+    Car,
+    Plates_Reads,
+    Road,
+    Sensor,
+)
+from sensor.identity import clear_identity_caches, identity_cache_stats, resolve_cars
+from sensor.serializers import PLatesReadSerializer, create_plate_reads
+
+PLATES_READ_URL = reverse('sensor:plates_reads-list')
+INGEST_URL = reverse('sensor:plates_reads-ingest')
+
+
+def create_user(email='user@example.com', password='testpass123'):
+    """Create and return a user with given parameters."""
+    return get_user_model().objects.create_user(email=email, password=password)
+
+
+def create_road(**params):
+    """Create and return a road with given parameters"""
+    defaults = {
+        'name': 'Road name',
+        'segment': LineString(
+            (103.9460064, 30.75066046),
+            (103.9564943, 30.7450801),
+        ),
+        'length': 1179.2,
+    }
+    defaults.update(params)
+    return Road.objects.create(**defaults)
+
+
+def create_sensor(**params):
+    """Create and return a sensor with given parameters"""
+    defaults = {
+        'name': 'Sensor name',
+        'uuid': uuid.uuid4(),
+    }
+    defaults.update(params)
+    return Sensor.objects.create(**defaults)
+
+
+def read_payload(road, sensor, plate='AA16AA', timestamp='2022-04-09T14:10:00Z'):
+    """Return a plate read payload."""
+    return {
+        'road_segment': road.id,
+        'car__license_plate': plate,
+        'timestamp': timestamp,
+        'sensor__uuid': str(sensor.uuid),
+    }
+
+
+class PrivatePlatesReadApiTests(TestCase):
+    """
+    Test authenticated plates read API access.
+    """
+
+    def setUp(self):
+        clear_identity_caches()
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        self.road = create_road()
+        self.sensor = create_sensor()
+
+    def test_create_plate_read(self):
+        """Test creating a single plate read."""
+        res = self.client.post(
+            PLATES_READ_URL, read_payload(self.road, self.sensor), format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        read = Plates_Reads.objects.get(id=res.data['id'])
+        self.assertEqual(read.road_segment, self.road)
+        self.assertEqual(read.sensor, self.sensor)
+        self.assertEqual(read.car_plate.license_plate, 'AA16AA')
+
+    def test_create_plate_read_invalid_road(self):
+        """Test non-integral, boolean and out of range road ids are rejected, not truncated."""
+        for road_segment in (1.9, True, 0, 2 ** 63):
+            payload = {**read_payload(self.road, self.sensor), 'road_segment': road_segment}
+            res = self.client.post(PLATES_READ_URL, payload, format='json')
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST, road_segment)
+            self.assertIn('road_segment', res.data)
+        self.assertFalse(Plates_Reads.objects.exists())
+
+    def test_create_plate_reads_batch(self):
+        """Test creating a batch of reads upserts the cars once."""
+        Car.objects.create(license_plate='AA16AA')
+        payload = [
+            read_payload(self.road, self.sensor, plate='AA16AA'),
+            read_payload(self.road, self.sensor, plate='BB17BB'),
+            read_payload(self.road, self.sensor, plate='BB17BB'),
+        ]
+
+        res = self.client.post(PLATES_READ_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data), 3)
+        self.assertEqual(Car.objects.count(), 2)
+        self.assertEqual(Plates_Reads.objects.count(), 3)
+        self.assertEqual(res.data[1]['car']['license_plate'], 'BB17BB')
+        self.assertEqual(res.data[1]['sensor']['uuid'], str(self.sensor.uuid))
+
+    def test_create_plate_reads_batch_constant_queries(self):
+        """Test the queries of a batch do not grow with its size."""
+
+        def post_queries(size, prefix):
+            payload = [
+                read_payload(self.road, self.sensor, plate=f'{prefix}{i}') for i in range(size)
+            ]
+            clear_identity_caches()
+            with CaptureQueriesContext(connection) as ctx:
+                res = self.client.post(PLATES_READ_URL, payload, format='json')
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+            return len(ctx.captured_queries)
+
+        self.assertEqual(post_queries(5, 'A'), post_queries(500, 'B'))
+
+    def test_create_plate_reads_async(self):
+        """Test Prefer: respond-async queues the reads until the queue is drained."""
+        payload = [
+            read_payload(self.road, self.sensor),
+            read_payload(self.road, self.sensor, plate='BB17BB'),
+        ]
+        with tempfile.TemporaryDirectory() as tmp, \
+                self.settings(INGEST_QUEUE_PATH=os.path.join(tmp, 'queue.sqlite3')):
+            res = self.client.post(PLATES_READ_URL, payload, format='json', HTTP_PREFER='respond-async')
+
+            self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+            self.assertEqual(res.data['queued'], 2)
+            self.assertFalse(Plates_Reads.objects.exists())
+
+            call_command('drain_ingest_queue', once=True, stdout=StringIO())
+
+        self.assertEqual(Plates_Reads.objects.count(), 2)
+        self.assertTrue(Car.objects.filter(license_plate='BB17BB').exists())
+
+    def test_create_plate_reads_async_out_of_range_road(self):
+        """Test an out of range road id is rejected before it reaches the queue."""
+        with tempfile.TemporaryDirectory() as tmp, \
+                self.settings(INGEST_QUEUE_PATH=os.path.join(tmp, 'queue.sqlite3')):
+            for road_segment in (2 ** 63, 1e30):
+                payload = [{**read_payload(self.road, self.sensor), 'road_segment': road_segment}]
+                res = self.client.post(
+                    PLATES_READ_URL, payload, format='json', HTTP_PREFER='respond-async'
+                )
+
+                self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST, road_segment)
+            self.assertEqual(IngestQueue(os.path.join(tmp, 'queue.sqlite3')).depth(), 0)
+
+    def test_list_plate_reads(self):
+        """Test the list renders reads like the serializer, without the road geometry."""
+        self.client.post(
+            PLATES_READ_URL, [read_payload(self.road, self.sensor)], format='json'
+        )
+        read = Plates_Reads.objects.get()
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(PLATES_READ_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data['results'], [PLatesReadSerializer(read).data]
+        )
+        self.assertEqual(
+            res.data['results'][0]['road_segment'],
+            {'id': self.road.id, 'name': self.road.name},
+        )
+        self.assertFalse(any('segment"' in q['sql'] for q in ctx.captured_queries))
+
+    def test_create_plate_reads_identity_cache(self):
+        """Test repeated sensors and plates are not looked up again."""
+        payload = [
+            read_payload(self.road, self.sensor, plate='AA16AA'),
+            read_payload(self.road, self.sensor, plate='BB17BB'),
+        ]
+        self.client.post(PLATES_READ_URL, payload, format='json')
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.post(PLATES_READ_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data[1]['car']['license_plate'], 'BB17BB')
+        tables = ('"core_sensor"', '"core_car"')
+        self.assertFalse(
+            [q['sql'] for q in ctx.captured_queries if any(t in q['sql'] for t in tables)]
+        )
+        stats = identity_cache_stats()
+        self.assertEqual(stats['sensors']['hits'], 1)
+        self.assertEqual(stats['cars']['hits'], 2)
+
+    def test_create_plate_reads_deleted_sensor(self):
+        """Test a deleted sensor is dropped from the identity cache."""
+        other = create_sensor(name='Other sensor')
+        self.client.post(PLATES_READ_URL, [read_payload(self.road, other)], format='json')
+        Plates_Reads.objects.filter(sensor=other).delete()
+        other.delete()
+
+        res = self.client.post(PLATES_READ_URL, [read_payload(self.road, other)], format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_create_plate_reads_unknown_sensor(self):
+        """Test a batch with an unknown sensor is rejected."""
+        other = Sensor(uuid=uuid.uuid4())
+        payload = [
+            read_payload(self.road, self.sensor),
+            read_payload(self.road, other),
+        ]
+
+        res = self.client.post(PLATES_READ_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Plates_Reads.objects.exists())
+
+
+class IngestPlatesReadApiTests(TestCase):
+    """
+    Test the COPY based plates read ingestion API.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        _, key = APIKey.objects.create_key(name='sensor fleet')
+        self.credentials = {settings.API_KEY_CUSTOM_HEADER: key}
+        self.road = create_road()
+        self.sensor = create_sensor()
+
+    def test_ingest_requires_api_key(self):
+        """Test the ingestion endpoint rejects requests without an API key."""
+        res = self.client.post(
+            INGEST_URL, [read_payload(self.road, self.sensor)], format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_ingest_plate_reads(self):
+        """Test ingesting reads, skipping invalid and unresolvable ones."""
+        Car.objects.create(license_plate='AA16AA')
+        payload = [
+            read_payload(self.road, self.sensor, plate='AA16AA'),
+            read_payload(self.road, self.sensor, plate='CC18CC'),
+            read_payload(self.road, self.sensor, timestamp='yesterday'),
+            read_payload(self.road, Sensor(uuid=uuid.uuid4())),
+        ]
+
+        res = self.client.post(INGEST_URL, payload, format='json', **self.credentials)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['received'], 4)
+        self.assertEqual(res.data['created'], 2)
+        self.assertEqual(res.data['unresolved'], 1)
+        self.assertEqual([r['index'] for r in res.data['rejected']], [2])
+        self.assertEqual(Car.objects.filter(license_plate='CC18CC').count(), 1)
+        self.assertEqual(Plates_Reads.objects.filter(sensor=self.sensor).count(), 2)
+
+    def test_ingest_rejects_out_of_range_road(self):
+        """Test a road id past the bigint range is rejected instead of failing the COPY."""
+        payload = [
+            read_payload(self.road, self.sensor),
+            {**read_payload(self.road, self.sensor), 'road_segment': 2 ** 63},
+            {**read_payload(self.road, self.sensor), 'road_segment': 1.5},
+        ]
+
+        res = self.client.post(INGEST_URL, payload, format='json', **self.credentials)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['created'], 1)
+        self.assertEqual([r['index'] for r in res.data['rejected']], [1, 2])
+
+    def test_ingest_rejects_nul_in_plate(self):
+        """Test a license plate with a NUL character is rejected instead of failing the COPY."""
+        payload = [
+            read_payload(self.road, self.sensor),
+            read_payload(self.road, self.sensor, plate='AA\u000016AA'),
+        ]
+
+        res = self.client.post(INGEST_URL, payload, format='json', **self.credentials)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['created'], 1)
+        self.assertEqual([r['index'] for r in res.data['rejected']], [1])
+        self.assertEqual(list(Car.objects.values_list('license_plate', flat=True)), ['AA16AA'])
+
+    @override_settings(PLATE_INGEST_CHUNK_SIZE=2)
+    def test_ingest_ndjson_stream(self):
+        """Test ingesting NDJSON in chunks, reporting malformed lines."""
+        lines = [
+            json.dumps(read_payload(self.road, self.sensor, plate=f'ND{i}')) for i in range(5)
+        ]
+        lines.insert(3, '{not json')
+        body = '\n'.join(lines).encode()
+
+        res = self.client.post(
+            INGEST_URL, body, content_type='application/x-ndjson', **self.credentials
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['received'], 6)
+        self.assertEqual(res.data['created'], 5)
+        self.assertEqual(res.data['rejected'][0]['index'], 3)
+        self.assertEqual(Plates_Reads.objects.count(), 5)
+
+    def test_ingest_gzip_csv_stream(self):
+        """Test ingesting gzip encoded CSV."""
+        rows = ['road_segment,car__license_plate,sensor__uuid,timestamp']
+        for i in range(3):
+            rows.append(f'{self.road.id},CS{i},{self.sensor.uuid},2022-04-09T14:1{i}:00Z')
+        body = gzip.compress('\n'.join(rows).encode())
+
+        res = self.client.post(
+            INGEST_URL,
+            body,
+            content_type='text/csv',
+            HTTP_CONTENT_ENCODING='gzip',
+            **self.credentials,
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['created'], 3)
+        self.assertTrue(Car.objects.filter(license_plate='CS2').exists())
+
+    def test_ingest_truncated_gzip(self):
+        """Test a truncated gzip upload is a 400 reporting what was committed."""
+        rows = ['road_segment,car__license_plate,sensor__uuid,timestamp']
+        for i in range(3):
+            rows.append(f'{self.road.id},TR{i},{self.sensor.uuid},2022-04-09T14:1{i}:00Z')
+        body = gzip.compress('\n'.join(rows).encode())[:-12]
+
+        res = self.client.post(
+            INGEST_URL,
+            body,
+            content_type='text/csv',
+            HTTP_CONTENT_ENCODING='gzip',
+            **self.credentials,
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('detail', res.data)
+        self.assertEqual(res.data['created'], 0)
+
+    def test_ingest_not_gzip(self):
+        """Test a body that is not gzip despite its Content-Encoding is a 400."""
+        res = self.client.post(
+            INGEST_URL,
+            b'road_segment,car__license_plate\n1,AA16AA\n',
+            content_type='text/csv',
+            HTTP_CONTENT_ENCODING='gzip',
+            **self.credentials,
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('detail', res.data)
+
+    def test_ingest_broken_csv(self):
+        """Test CSV the reader rejects (NUL bytes, oversized fields) is a 400 instead of a server error."""
+        res = self.client.post(
+            INGEST_URL,
+            b'road_segment,car__license_plate,sensor__uuid,timestamp\n1,"' + b'A' * 200000 + b'",x,y\n',
+            content_type='text/csv',
+            **self.credentials,
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('detail', res.data)
+
+
+class StaleIdentityCacheTests(TransactionTestCase):
+    """
+    Test the plate read creation recovers from a stale identity cache. Needs
+    real commits: the deferred foreign key check only fails when the
+    creation transaction commits.
+    """
+
+    def setUp(self):
+        clear_identity_caches()
+        self.road = create_road()
+        self.sensor = create_sensor()
+
+    def test_retry_after_car_deleted_elsewhere(self):
+        """Test a car deleted without signals is recreated by the retry."""
+        car = resolve_cars({'AA16AA'})['AA16AA']
+        with connection.cursor() as cursor:
+            # raw SQL, as another process would, so the cache is not evicted
+            cursor.execute(f'DELETE FROM {Car._meta.db_table} WHERE id = %s', [car.id])
+
+        reads = create_plate_reads([{
+            'road_segment': self.road.id,
+            'car__license_plate': 'AA16AA',
+            'sensor__uuid': self.sensor.uuid,
+            'read_at': timezone.now(),
+        }])
+
+        read = Plates_Reads.objects.select_related('car_plate').get(pk=reads[0].pk)
+        self.assertEqual(read.car_plate.license_plate, 'AA16AA')
+        self.assertNotEqual(read.car_plate_id, car.id)
@@ -1,6 +1,9 @@
 """
 Views for the road APIs.
 """
+from collections.abc import Iterator
+
+from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from rest_framework import viewsets
 from rest_framework.decorators import action
@@ -10,16 +13,23 @@ from datetime import (
     timedelta
 )
 from django.utils import timezone
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
-from rest_framework_api_key.permissions import HasAPIKey
 
+from core.authentication import CachedTokenAuthentication
+from core.ingest_queue import enqueue_response, wants_async
+from core.pagination import KeysetPaginationMixin
+from core.parsers import ORJSONParser
+from core.permissions import CachedHasAPIKey
 from core.models import (
     Car,
     Sensor,
     Plates_Reads
 )
 from sensor import serializers
+from sensor.ingest import ingest_plate_reads
+from sensor.parsers import CSVParser, NDJSONParser
+
+MAX_INGEST_READS = 100000
 
 
 
@@ -29,7 +39,7 @@ class SensorViewSet(viewsets.ModelViewSet):
 
     serializer_class = serializers.SensorSerializer
     queryset = Sensor.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticatedOrReadOnly]
     
 
@@ -39,21 +49,31 @@ class SensorViewSet(viewsets.ModelViewSet):
     
 
 
-class PlateReadViewSet(viewsets.ModelViewSet):
+class PlateReadViewSet(KeysetPaginationMixin, viewsets.ModelViewSet):
     """View for manage PlatesRead Apis."""
 
     serializer_class = serializers.PLatesReadSerializer
     queryset = Plates_Reads.objects.all()
-    permission_classes = [HasAPIKey |IsAuthenticatedOrReadOnly]
+    permission_classes = [CachedHasAPIKey | IsAuthenticatedOrReadOnly]
 
     def get_queryset(self):
         """Retrive roads ."""
         return self.queryset.order_by('-read_at')
+
+    def list(self, request, *args, **kwargs):
+        """List plate reads from a values() projection instead of model instances."""
+        rows = serializers.plate_read_rows(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(serializers.serialize_plate_read_rows(page))
+        return Response(serializers.serialize_plate_read_rows(rows))
     
     def create(self, request):
         is_many = isinstance(request.data, list)
         serializer = self.get_serializer(data=request.data, many=is_many)
         serializer.is_valid(raise_exception=True)
+        if wants_async(request):
+            return self.enqueue(serializer.validated_data if is_many else [serializer.validated_data])
         self.perform_create(serializer)
 
         if is_many:
@@ -62,6 +82,57 @@ class PlateReadViewSet(viewsets.ModelViewSet):
             headers = self.get_success_headers(serializer.data)
             return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
+    def enqueue(self, validated):
+        """Queue validated reads for drain_ingest_queue and answer 202."""
+        if len(validated) > MAX_INGEST_READS:
+            return Response(
+                {"detail": f"At most {MAX_INGEST_READS} reads per request."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        items = [
+            {
+                'road_segment': data['road_segment'],
+                'car__license_plate': data['car__license_plate'],
+                'sensor__uuid': str(data['sensor__uuid']),
+                'timestamp': data['read_at'].isoformat(),
+            }
+            for data in validated
+        ]
+        return enqueue_response('plate-reads', items)
+
+    @extend_schema(request=serializers.PLatesReadSerializer(many=True), responses=OpenApiTypes.OBJECT)
+    @action(
+        methods=['post'],
+        detail=False,
+        url_path='ingest',
+        permission_classes=[CachedHasAPIKey],
+        parser_classes=[ORJSONParser, NDJSONParser, CSVParser],
+    )
+    def ingest(self, request):
+        """
+        High volume ingestion of plate reads through PostgreSQL COPY.
+        Accepts a JSON array, or NDJSON / CSV (optionally gzip encoded) that
+        is parsed and flushed in chunks while the upload is being read.
+        """
+        if isinstance(request.data, list):
+            if len(request.data) > MAX_INGEST_READS:
+                return Response(
+                    {"detail": f"At most {MAX_INGEST_READS} reads per request."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        elif not isinstance(request.data, Iterator):
+            return Response(
+                {"detail": "Expected a list of plate reads."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        report = ingest_plate_reads(request.data)
+        if report['created'] and 'detail' not in report:
+            code = status.HTTP_201_CREATED
+        else:
+            code = status.HTTP_400_BAD_REQUEST
+        return Response(report, status=code)
+
     
 
 class CarViewSet(viewsets.ModelViewSet):
@@ -69,43 +140,70 @@ class CarViewSet(viewsets.ModelViewSet):
 
     serializer_class = serializers.CarSerializer
     queryset = Car.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticatedOrReadOnly]
 
     @extend_schema(
         parameters=[
             OpenApiParameter(
                 name='license_plate',
-                description='License plate to filter reads from the last 24h',
-                required=True,
+                description='License plate, repeat the parameter for several plates',
+                required=False,
                 type=str,
                 location=OpenApiParameter.QUERY
-            )
-        ]
+            ),
+            OpenApiParameter(
+                name='plates',
+                description='Comma separated license plates',
+                required=False,
+                type=str,
+                location=OpenApiParameter.QUERY
+            ),
+            OpenApiParameter(
+                name='from',
+                description='Start of the window (default: 24h before "to")',
+                required=False,
+                type=str,
+                location=OpenApiParameter.QUERY
+            ),
+            OpenApiParameter(
+                name='to',
+                description='End of the window (default: now)',
+                required=False,
+                type=str,
+                location=OpenApiParameter.QUERY
+            ),
+        ],
+        request=serializers.PassByQuerySerializer,
+        responses=OpenApiTypes.OBJECT,
     )
-    @action(methods=['get'], detail=False, url_path='pass-by')
+    @action(methods=['get', 'post'], detail=False, url_path='pass-by')
     def get_by_plate(self, request):
-        """Custom endpoint to filter by license_plate and last 24h."""
-        license_plate = request.query_params.get('license_plate')
-        if not license_plate:
-            return Response(
-                {"detail": "Missing license_plate parameter."},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        try:
-            car = Car.objects.get(license_plate=license_plate)
-        except Car.DoesNotExist:
-            return Response(
-                {"error": "Car not recognized."},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        since = timezone.now() - timedelta(hours=24)
-        reads = Plates_Reads.objects.filter(
-            car_plate=car,
-            read_at__gte=since
-        ).select_related('sensor', 'road_segment')
-
-        serializer = serializers.PLatesReadSerializer(reads, many=True)
-        return Response(serializer.data)
+        """
+        Reads of one or many license plates in a time window (last 24h by
+        default), grouped per plate and paginated over the reads. Large plate
+        lists can be POSTed as {"plates": [...], "from": ..., "to": ...}.
+        """
+        if request.method == 'POST':
+            source = request.data if isinstance(request.data, dict) else {}
+            params = {'plates': source.get('plates')} if 'plates' in source else {}
+        else:
+            source = request.query_params
+            plates = source.getlist('license_plate') + [
+                plate for value in source.getlist('plates') for plate in value.split(',') if plate
+            ]
+            params = {'plates': plates} if plates else {}
+        params.update(
+            (key, source[param]) for key, param in (('start', 'from'), ('end', 'to')) if param in source
+        )
+        query = serializers.PassByQuerySerializer(data=params)
+        query.is_valid(raise_exception=True)
+
+        end = query.validated_data.get('end') or timezone.now()
+        start = query.validated_data.get('start') or end - timedelta(hours=24)
+        rows = serializers.pass_by_rows(set(query.validated_data['plates']), start, end)
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(serializers.group_by_plate(page))
+        return Response(serializers.group_by_plate(rows))